@@ -19,39 +19,70 @@
 # MADE BY MARK BROMLEY, JANUARY 2014
 
 
-# Import all the relevant libraries
+# Import all the relevant libraries. The clock is read first, so the 
+# startup report includes the time taken to import everything else.
+from time import perf_counter
+startTime = perf_counter()
+import os
+import sys
+import threading
 import pygame
 import event_manager as EventManager
+import startup_timer as StartupTimer
+import command_line as CommandLine
 from views import game_view as GameView
+from views import display as Display
 from controllers import game_controller as Controller
 from models import game_model as GameModel
+from views import sound_view as SoundBank
 
 class Game():
     """The Game Class which is responsible for initialising the main Model,
-    Controller, View and Event Manager classes. This class has no methods or
-    properties and is simply used to initialise the game."""
-    def __init__(self):
+    Controller, View and Event Manager classes. This class is simply used to
+    initialise the game. By default the game starts in fast startup mode, 
+    where only the display and fonts needed by the first screen are brought 
+    up before the first frame, and audio is started in the background. In
+    headless mode the game runs without a window, using SDL's dummy video 
+    and audio drivers, and frames are never presented, so it can run on 
+    machines without a display e.g. for automated playtests and load runs."""
+    def __init__(self, fastStartup=True, startupReport=False, 
+                 dirtyRendering=False, headless=False, drawing=True,
+                 renderRate=GameView.SIMULATION_RATE, 
+                 windowSize=Display.WINDOW_SIZE, resolution=None):
         """Initialise the whole game, including Model, View, Controller and
         Event Manager. Start the background music playing and initialise
-        pygame, setting up the game window and the game clock."""
-        # Initialise all Pygame modules. Note that no exceptions will be
-        # raised if there is a failure in loading a module. The method returns
-        # an integer representing the number of modules loaded.
-        pygame.init()
+        pygame, setting up the game window and the game clock. If requested,
+        a report of the time taken by each startup phase is printed once the
+        first frame has been shown, and dirty rendering only redraws the 
+        changed parts of the window each frame. In headless mode drawing 
+        can also be turned off, so only the game's logic runs. The game is 
+        drawn at up to the render rate in frames a second, independently of 
+        the rate the game is simulated at. The game window is opened at the
+        window size, and if an internal resolution is given the game is 
+        drawn at that size and scaled to the window."""
+        self.startupTimer = StartupTimer.StartupTimer(startTime)
+        self.startupTimer.mark('Imports')
+        if headless:
+            # The dummy drivers must be chosen before pygame starts them
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        else:
+            drawing = True
+        if fastStartup:
+            # Only initialise the display and font modules, which are all 
+            # that the first screen needs. The joysticks are looked for once
+            # the first frame has been shown and the mixer is started below.
+            pygame.display.init()
+            pygame.font.init()
+        else:
+            # Initialise all Pygame modules. Note that no exceptions will be
+            # raised if there is a failure in loading a module. The method 
+            # returns an integer representing the number of modules loaded.
+            pygame.init()
 
         # Add a caption to the game window, showing the name of the game
         pygame.display.set_caption('Super Markio!')
-        # Try to load the music files
-        # These should be able to play, but if there's no sound card an
-        # exception will be thrown. Additionally, Linux seems to have weak 
-        # support for audio files depending on distribution, causing additional
-        # excpetions to be thrown. If an exception is thrown, forget about it
-        # and continue.
-        try:
-            pygame.mixer.music.load('./assets/audio/mario_bg.wav')
-            pygame.mixer.music.play(-1, 0.0)
-        except Exception:
-            pass
+        self.startupTimer.mark('Display initialisation')
 
         # Initialise the Event Manager. The Event Manager allows different 
         # modules and classes to communicate with each other, by posting and 
@@ -67,6 +98,26 @@ class Game():
         # Initialise the model to currently run on level 1. A list of levels 
         # available can be retrieved if required.
         model.set_game_level(1)
+        self.startupTimer.mark('Model')
+
+        # Start the music and decode all the sound effects once, so that 
+        # playing them in the game loop never touches the disk. The mixer is
+        # always initialised here, on the main thread, as SDL doesn't promise
+        # its subsystems can be started from other threads or alongside the
+        # video subsystem. In fast startup mode only the loading of the music
+        # and sound effects then happens in the background; until it 
+        # finishes the sound bank quietly does nothing, as it does if there's
+        # no sound card.
+        self._init_mixer()
+        self.startupTimer.mark('Mixer')
+        if fastStartup:
+            audio = threading.Thread(target=self._start_audio, 
+                                     args=(model, True))
+            audio.daemon = True
+            audio.start()
+        else:
+            self._start_audio(model, False)
+            self.startupTimer.mark('Audio')
 
         # Initialise the game controller. This module abstracts the 
         # differences between all forms of joystick controller 
@@ -75,18 +126,78 @@ class Game():
         # module. The Event Manager is passed into to allow the controller to
         # register as a subscriber.
         controller = Controller.GameController(eventManager)
+        self.startupTimer.mark('Controller')
 
         # Initialise the Pygame clock to be used for timing events and 
         # controlling the frame rate later on.
         clock = pygame.time.Clock()
 
         # Initialise the game's outer view. This view spawns subviews for
-        # each level and menus, when appropriate.
-        view = GameView.GameView(clock, model, controller, eventManager)
+        # each level and menus, when appropriate. The startup timer is passed
+        # in so the view can mark the first frame and print the report.
+        view = GameView.GameView(clock, model, controller, eventManager,
+                                 self.startupTimer if startupReport else None,
+                                 dirtyRendering, not headless, drawing,
+                                 renderRate=renderRate,
+                                 windowSize=windowSize,
+                                 resolution=resolution)
+        self.startupTimer.mark('Game view')
         
         # Activate and generate the game, to begin.
         view.generate_whole_game()
 
+    def _init_mixer(self):
+        """Private method. Initialises the mixer, if it isn't already. If
+        there's no sound card an exception will be thrown, which is ignored,
+        leaving the game to run silently."""
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except Exception:
+            pass
+
+    def _start_audio(self, model, background):
+        """Private method. Starts the background music and loads the sound
+        bank, recording how long it took. The mixer must already have been
+        initialised on the main thread. This may then run on a background
+        thread, as decoding the files only touches this thread's own data
+        and SDL_mixer locks the audio device itself whenever the music or
+        the mixer's channels are changed, so it never races the audio 
+        callback or the main thread."""
+        audioStart = perf_counter()
+        # Try to load the music files
+        # These should be able to play, but if there's no sound card an
+        # exception will be thrown. Additionally, Linux seems to have weak 
+        # support for audio files depending on distribution, causing additional
+        # excpetions to be thrown. If an exception is thrown, forget about it
+        # and continue.
+        try:
+            pygame.mixer.music.load('./assets/audio/mario_bg.wav')
+            pygame.mixer.music.play(-1, 0.0)
+        except Exception:
+            pass
+        SoundBank.soundBank.load(model.soundEffects)
+        if background:
+            self.startupTimer.record_background('Audio',
+                                                perf_counter() - audioStart)
+
 if __name__ == "__main__":
     print("\nSUPER MARKIO STARTING...")
-    game = Game()
\ No newline at end of file
+    # Command line options: '--full-init' initialises every pygame module 
+    # up front, '--startup-report' prints the startup time report, 
+    # '--dirty-rects' turns on dirty rectangle rendering, '--headless' runs
+    # without a window, '--no-draw' skips drawing when headless and 
+    # '--render-rate=<frames a second>' sets the most frames drawn a second.
+    # '--window-size=<width>x<height>' sets the size of the game window and
+    # '--resolution=<width>x<height>' the size the game is drawn at
+    game = Game(fastStartup='--full-init' not in sys.argv,
+                startupReport='--startup-report' in sys.argv,
+                dirtyRendering='--dirty-rects' in sys.argv,
+                headless='--headless' in sys.argv,
+                drawing='--no-draw' not in sys.argv,
+                renderRate=CommandLine.get_option('render-rate', 
+                                                  GameView.SIMULATION_RATE, 
+                                                  int),
+                windowSize=CommandLine.get_size_option('window-size', 
+                                                       Display.WINDOW_SIZE),
+                resolution=CommandLine.get_size_option('resolution', None))
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""Microbenchmark of the player's block collision check. Generates levels from
+1x to 100x the width of the built in levels and, for each, times checking a
+player sized rect against the level's block positions, both by scanning
+every block as the game used to and with the spatial grid the game uses now.
+Both checks are run over the same random rects and must give the same
+answers. The results are printed as a table.
+
+Run from the game's root directory:
+
+    python collision_benchmark.py [--sizes=1,10,100] [--queries=2000]
+                                  [--seed=0]
+
+The benchmark doesn't open a window."""
+import os
+import random
+import shutil
+import tempfile
+from time import perf_counter
+import pygame
+import command_line as CommandLine
+from models import game_model as GameModel
+from models import level_generator as LevelGenerator
+from models import level_source as LevelSource
+from views import display as Display
+from views import platforms_view as Platform
+from views import spatial_grid as SpatialGrid
+
+DEFAULT_SIZES = [1, 10, 100]
+# Size of the rect checked against the blocks, about that of the player
+QUERY_SIZE = (90, 100)
+
+class CollisionBenchmark():
+    """Runs the collision microbenchmark over a range of generated level
+    sizes."""
+
+    def __init__(self, sizes=DEFAULT_SIZES, queries=2000, seed=0):
+        """Set the level sizes, as multiples of the built in level width, the
+        number of rects to check for each size and the random seed."""
+        self.sizes = sizes
+        self.queries = queries
+        self.seed = seed
+        self.generator = LevelGenerator.LevelGenerator(seed)
+        self.model = GameModel.GameModel()
+        self.levelsUrl = tempfile.mkdtemp()
+        # List of result dictionaries, one for each size
+        self.results = []
+
+    def run(self):
+        """Runs every size in turn and returns the list of results."""
+        try:
+            for scale in self.sizes:
+                self.results.append(self._run_size(scale))
+        finally:
+            shutil.rmtree(self.levelsUrl, ignore_errors=True)
+        return self.results
+
+    def get_report(self):
+        """Returns the results as a printable table."""
+        header = '%6s %8s %14s %10s %10s %9s' % ('Scale', 'Blocks',
+                                                 'Grid build ms', 'Scan us',
+                                                 'Grid us', 'Speedup')
+        lines = [header, '-' * len(header)]
+        for result in self.results:
+            speedup = result['scan'] / result['grid'] if result['grid'] else 0
+            lines.append('%5sx %8d %14.2f %10.2f %10.2f %8.1fx' % (
+                result['scale'], result['blocks'], result['build'],
+                result['scan'], result['grid'], speedup))
+        return '\n'.join(lines)
+
+    def _run_size(self, scale):
+        """Private method. Generates a level of the given scale and times
+        both collision checks, returning a dictionary of results."""
+        rows = self.generator.generate_scaled(scale)
+        levelUrl = os.path.join(self.levelsUrl, 'level_%sx.rle' % scale)
+        LevelSource.LevelSource.save(levelUrl, rows)
+        self.model.set_game_level(self.model.add_level(levelUrl))
+        platform = Platform.PlatformDesign(self.model, Display.WINDOW_SIZE)
+        blocks = (platform.get_level_block_positions() +
+                  platform.get_level_invis_positions())
+        start = perf_counter()
+        grid = SpatialGrid.SpatialGrid(blocks)
+        buildTime = perf_counter() - start
+        # The same random rects are checked at every size, spread along the
+        # whole level
+        randomiser = random.Random(self.seed)
+        width = platform.get_level_end_point()
+        rects = [pygame.Rect(randomiser.randrange(-QUERY_SIZE[0], width),
+                             randomiser.randrange(-QUERY_SIZE[1],
+                                                  Display.WINDOW_SIZE[1]),
+                             *QUERY_SIZE)
+                 for i in range(self.queries)]
+        start = perf_counter()
+        scanHits = [self._scan(blocks, rect) for rect in rects]
+        scanTime = perf_counter() - start
+        start = perf_counter()
+        gridHits = [grid.collide_rect(rect) for rect in rects]
+        gridTime = perf_counter() - start
+        if scanHits != gridHits:
+            raise AssertionError('Grid and scan disagree at %sx' % scale)
+        return {'scale' : scale,
+                'blocks' : len(blocks),
+                'build' : buildTime * 1000,
+                'scan' : scanTime / self.queries * 1000000,
+                'grid' : gridTime / self.queries * 1000000}
+
+    def _scan(self, blocks, rect):
+        """Private method. Checks the rect against every block in turn, as
+        the player's collision check did before the spatial grid."""
+        for blockTuple in blocks:
+            if rect.collidepoint(blockTuple):
+                return True
+        return False
+
+if __name__ == "__main__":
+    benchmark = CollisionBenchmark(CommandLine.get_scales_option('sizes',
+                                                                 DEFAULT_SIZES),
+                                   CommandLine.get_option('queries', 2000, int),
+                                   CommandLine.get_option('seed', 0, int))
+    benchmark.run()
+    print(benchmark.get_report())
@@ -0,0 +1,51 @@
+import sys
+
+# Descriptions of the option types, for usage errors
+TYPE_NAMES = {int : 'a whole number', float : 'a number'}
+
+def get_option(name, default, optionType=str):
+    """Returns the value of a '--name=value' command line option converted
+    with the given type e.g. int, or the default if it wasn't given. If the
+    value can't be converted a usage error is printed and the program
+    exits."""
+    for argument in sys.argv[1:]:
+        if argument.startswith('--' + name + '='):
+            value = argument.split('=', 1)[1]
+            try:
+                return optionType(value)
+            except ValueError:
+                exit_with_usage_error(name, value, 
+                                      TYPE_NAMES.get(optionType, 'a value'))
+    return default
+
+def get_size_option(name, default):
+    """Returns the size given by a '--name=<width>x<height>' command line
+    option as a (width, height) pair, or the default if it wasn't given."""
+    value = get_option(name, None)
+    if value is None:
+        return default
+    try:
+        width, height = (int(length) for length in value.lower().split('x'))
+    except ValueError:
+        exit_with_usage_error(name, value, '<width>x<height>')
+    return (width, height)
+
+def get_scales_option(name, default):
+    """Returns the list of level scales given by a '--name=1,2.5,10' command
+    line option, or the default list if it wasn't given. Scales written with
+    a decimal point are floats and the rest are integers."""
+    value = get_option(name, None)
+    if value is None:
+        return default
+    try:
+        return [float(scale) if '.' in scale else int(scale)
+                for scale in value.split(',')]
+    except ValueError:
+        exit_with_usage_error(name, value, 'a list of numbers e.g. 1,2.5,10')
+
+def exit_with_usage_error(name, value, expected):
+    """Prints an error for a command line option whose value couldn't be
+    read and exits, as argparse does."""
+    sys.stderr.write("%s: error: --%s expects %s, not '%s'\n" % (
+        sys.argv[0], name, expected, value))
+    sys.exit(2)
@@ -223,24 +223,32 @@ class PrimaryController():
     }# End of supportedControllers dictionary
 
     def __init__(self):
-        """Initialise all the class properties and locate any connected 
-        joysticks, selecting the joysticks in order of preference based on 
-        the order in which they are specified. Initialise the top preference
-        joystick."""
-
-        # Initialise all pygame modules if they aren't already initialised
-        pygame.init() 
+        """Initialise all the class properties. Connected joysticks aren't 
+        located here, so the joystick module doesn't slow down the game 
+        starting up. The game calls find_joysticks once the first frame has
+        been shown, and until then the keyboard is used."""
 
         # Specify the type of controller, to begin with we'll assume it's a
         # computer keyboard
         self.controlType = "keyboard"
         self.controllerName = "keyboard"
         self.joystickController = ""
+        # Below value specifies if connected joysticks have been looked for
+        self.joysticksSearched = False
 
         # Below two values help to create button pressures when there isn't
         # one available for real
         self.defaultPressureValue = 1
 
+    def find_joysticks(self):
+        """Locate any connected joysticks, selecting the joysticks in order
+        of preference based on the order in which they are specified. 
+        Initialise the top preference joystick."""
+        self.joysticksSearched = True
+
+        # Initialise the joystick module if it isn't already initialised
+        pygame.joystick.init()
+
         # Below is a list comprehension which lists all joysticks attached 
         #to the computer at the initialisation point
         joysticks = [x for x in range(pygame.joystick.get_count()) 
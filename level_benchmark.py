@@ -0,0 +1,166 @@
+"""Scaling benchmark for the level subsystems. Generates levels from 1x to
+100x the width of the built in levels and, for each, times building the
+platform design, constructing the level view and running frames of the sprite
+groups' update, then prints the results as a table, along with the mean number
+of sprites drawn and culled each frame. Each time is also shown as
+a multiple of the 1x time, so a subsystem scaling linearly with the level
+grows with the scale and one independent of it stays near x1.
+
+Run from the game's root directory:
+
+    python level_benchmark.py [--sizes=1,2,5] [--frames=200] [--seed=0]
+                              [--density=0.5]
+
+The benchmark runs without a window using SDL's dummy video driver. Memory is
+the peak of Python allocations while building the platform design and view,
+measured in a separate build as tracing slows everything down; surfaces are
+shared between levels and aren't included."""
+import gc
+import os
+import shutil
+import tempfile
+import tracemalloc
+from time import perf_counter
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import pygame
+import command_line as CommandLine
+import event_manager as EventManager
+from models import game_model as GameModel
+from models import level_generator as LevelGenerator
+from models import level_source as LevelSource
+from views import display as Display
+from views import level_view as PrimaryView
+from views import platforms_view as Platform
+
+DEFAULT_SIZES = [1, 2, 5, 10, 20, 50, 100]
+
+class LevelBenchmark():
+    """Runs the scaling benchmark over a range of generated level sizes."""
+
+    def __init__(self, sizes=DEFAULT_SIZES, frames=200, seed=0, density=0.5):
+        """Set the level sizes, as multiples of the built in level width, the
+        number of frames to run for each size and the generator settings."""
+        self.sizes = sizes
+        self.frames = frames
+        self.generator = LevelGenerator.LevelGenerator(seed, density)
+        self.model = GameModel.GameModel()
+        self.display = None
+        self.levelsUrl = tempfile.mkdtemp()
+        # List of result dictionaries, one for each size
+        self.results = []
+
+    def run(self):
+        """Runs every size in turn and returns the list of results. The
+        smallest level is run once first without recording it, so loading
+        the game's assets isn't counted against the first size."""
+        self.display = Display.Display()
+        try:
+            self._run_size(min(self.sizes))
+            for scale in self.sizes:
+                self.results.append(self._run_size(scale))
+                gc.collect()
+        finally:
+            shutil.rmtree(self.levelsUrl, ignore_errors=True)
+        return self.results
+
+    def get_report(self):
+        """Returns the results as a printable table."""
+        columns = [('Platform ms', 'platform'), ('View ms', 'view'),
+                   ('Frame ms', 'frame'), ('Peak MB', 'memory')]
+        header = '%6s %8s %8s %7s %7s' % ('Scale', 'Columns', 'Sprites',
+                                          'Drawn', 'Culled')
+        for title, key in columns:
+            header += ' %20s' % title
+        lines = [header, '-' * len(header)]
+        first = self.results[0] if self.results else None
+        for result in self.results:
+            line = '%5sx %8d %8d %7d %7d' % (result['scale'], result['columns'],
+                                             result['sprites'], result['drawn'],
+                                             result['culled'])
+            for title, key in columns:
+                ratio = result[key] / first[key] if first[key] else 0
+                line += ' %11.2f (x%5.1f)' % (result[key], ratio)
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def _run_size(self, scale):
+        """Private method. Generates a level of the given scale and measures
+        it, returning a dictionary of results."""
+        rows = self.generator.generate_scaled(scale)
+        levelUrl = os.path.join(self.levelsUrl, 'level_%sx.rle' % scale)
+        LevelSource.LevelSource.save(levelUrl, rows)
+        self.model.set_game_level(self.model.add_level(levelUrl))
+        # Time the platform design, including indexing the level file
+        start = perf_counter()
+        platform = self._build_platform()
+        platformTime = perf_counter() - start
+        eventManager = EventManager.EventManager()
+        start = perf_counter()
+        view = PrimaryView.PrimaryView(self.model, eventManager, platform,
+                                       display=self.display)
+        viewTime = perf_counter() - start
+        frameTime, drawn, culled = self._run_frames(view, eventManager)
+        sprites = sum(len(platform.positions[element])
+                      for element in platform.positions)
+        del view
+        gc.collect()
+        # Measure the memory of a second build with tracing switched on
+        tracemalloc.start()
+        platform = self._build_platform()
+        view = PrimaryView.PrimaryView(self.model, EventManager.EventManager(),
+                                       platform, display=self.display)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {'scale' : scale,
+                'columns' : len(max(rows, key=len)),
+                'sprites' : sprites,
+                'drawn' : drawn,
+                'culled' : culled,
+                'platform' : platformTime * 1000,
+                'view' : viewTime * 1000,
+                'frame' : frameTime * 1000,
+                'memory' : peak / (1024 * 1024)}
+
+    def _build_platform(self):
+        """Private method. Builds the platform design of the current level
+        from scratch, indexing the level file again."""
+        self.model.level_platforms.pop(self.model.currentGameLevel, None)
+        platform = Platform.PlatformDesign(self.model, self.display.size)
+        platform.preload()
+        return platform
+
+    def _run_frames(self, view, eventManager):
+        """Private method. Runs the sprite groups' update for the set number
+        of frames with the player running right, so the world scrolls, and
+        returns the mean time of a frame in seconds and the mean numbers of 
+        sprites drawn and culled each frame."""
+        total = 0
+        drawn = 0
+        culled = 0
+        for frame in range(self.frames):
+            if frame % 3 == 0:
+                # Clear any event left over e.g. the player dying, so the
+                # player keeps running
+                eventManager.currentEvent = None
+                eventManager.post(['CHARACTER_GO_RIGHT'])
+            start = perf_counter()
+            view.players.update_all_player_groups()
+            total += perf_counter() - start
+            counts = view.players.get_draw_counts()
+            drawn += counts[0]
+            culled += counts[1]
+        if not self.frames:
+            return 0, 0, 0
+        return (total / self.frames, drawn / self.frames, 
+                culled / self.frames)
+
+if __name__ == "__main__":
+    pygame.init()
+    benchmark = LevelBenchmark(CommandLine.get_scales_option('sizes', 
+                                                             DEFAULT_SIZES),
+                               CommandLine.get_option('frames', 200, int),
+                               CommandLine.get_option('seed', 0, int),
+                               CommandLine.get_option('density', 0.5, float))
+    benchmark.run()
+    print(benchmark.get_report())
@@ -1,3 +1,7 @@
+import os
+import re
+from models import level_source as LevelSource
+
 class GameModel():
     """Provides a data store for the entire game. Contains level
     configuration, image URLs, score file URLs and level enumeration 
@@ -12,106 +16,16 @@ class GameModel():
         dictionary is provided to enumerate sprite names against their
         internal representations."""
 
-        levelOne =[
-            ""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,"               AAA       PP   AA                      AAAA  A         AA                 AAA                          AAA      PP    AA                      AAAA  A         AA                 AAA              "
-            ,"     AAAA A  AA         AAAA                         PPP  A             PPPP         PPPP                   AAAA A  AA         AAAA                              A             P         PPPP                    "
-            ,"     AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A           AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A         "
-            ,"     PPPPPPPPPP  A   AAA AAAA       PPPPPPP                    PP     AAAA      PP             PPPPPPP     AA PPPPPPPP  A   AAA AAAA  PPPPPPPPPPPP      PPPPPPPP      PPPP  AAAA                                 "
-            ,"                                  "
-            ,"                    PPPPPP "
-            ,"            A                                                                                                                                                                                                  G"
-            ,"                               "
-            ,"AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA                                                                       AAAA                           A" 
-            ,"       M        Q           Q   Q        Q                                        X                Q           Q   Q        Q                                        X                Q           Q   Q          "
-            ,"IIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIII"
-        ]
-
-        levelTwo =[
-            ""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,"               AAA            AA                      AAAA  A         AA                 AAA                          AAA            AA                      AAAA  A         AA                 AAA              "
-            ,"     AAAA A  AA         AAAA                         PPPPP  A         PPPP         PPPP                    AAAA A  AA         AAAA                         PPPPP  A         PPPP                             "
-            ,"     AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A           AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A         "
-            ,"     PPPPPPPPPP  A   AAA AAAA  PPPPPPPPPPPP      PPPPPPPP      PPPPP  AAAA      PP         PPPPPPPPPPPP     PPPPPPPPPP  A   AAA AAAA  PPPPPPPPPPPP      PPPPPPPP      PPPPP  AAAA                                "
-            ,"     "
-            ,"     "
-            ,"                                                                                                                                                                                                               G"
-            ,"AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
-            ,"          "
-            ,"                                                    M     M                                          M      Q                             Q              M                                                       "
-            ,"PPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPPP"
-        ]
-
-        levelThree =[
-            ""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,"               AAA            AA                      AAAA  A         AA                 AAA                          AAA            AA                      AAAA  A         AA                 AAA              "
-            ,"     AAAA A  AA         AAAA                         PPPPP  A         PPPP         PPPP                    AAAA A  AA         AAAA                         PPPPP  A         PPPP                                 "
-            ,"     AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A           AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A         "
-            ,"     PPPPPPPPPP  A   AAA AAAA  PPPPPPPPPPPP      PPPPPPPP      PPPPP  AAAA      PP         PPPPPPPPPPPP     PPPPPPPPPP  A   AAA AAAA  PPPPPPPPPPPP      PPPPPPPP      PPPPP  AAAA                                "
-            ,""
-            ,""
-            ,"                                                                                                                                                                                                              G"
-            ,""
-            ,"AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA                                                                       AAAA                           A" 
-            ,"                Q           Q   Q        Q                                        X                M           Q   M       Q                                        X                Q           Q   Q          "
-            ,"IIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIII"
-        ]
-        
-        levelFour =[
-            ""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,""
-            ,"               AAA            AA                      AAAA  A         AA                 AAA                          AAA            AA                      AAAA  A         AA                 AAA              "
-            ,"     AAAA A  AA         AAAA                         PPPPP  A         PPPP         PPPP                    AAAA A  AA         AAAA                         PPPPP  A         PPPP                                 "
-            ,"     AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A           AAA  AA  A       AAAAAA     AAAA  AA          AAAA         AAAA   AA                   AA  A         "
-            ,"     PPPPPPPPPP  A   AAA AAAA  PPPPPPPPPPPP      PPPPPPPP      PPPPP  AAAA      PP         PPPPPPPPPPPP     PPPPPPPPPP  A   AAA AAAA  PPPPPPPPPPPP      PPPPPPPP      PPPPP  AAAA                                "
-            ,""
-            ,""
-            ,"                                          AAAAAAA                                                                                                                                                             G"
-            ,""
-            ,"AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA                                                                       AAAA                           A" 
-            ,"                Q           Q   Q        Q                                        M                Q           Q   M        Q                                        X                Q           Q   Q          "
-            ,"IIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIIII"
-        ]
         self.currentGameLevel = 0
+        # Provide the level platform design files, a level is added by
+        # adding a file named level_<number> to the levels directory
+        self.levelsUrl = './models/levels'
+        self.levelFiles = self._find_level_files(self.levelsUrl)
         # Number of game levels
-        self.levels = [1, 2, 3, 4]
-        # Add each level
-        self.level_platforms = [levelOne, levelTwo, levelThree, levelFour]
+        self.levels = list(range(1, len(self.levelFiles) + 1))
+        # Dictionary of level indexes to level sources, each level file is
+        # only indexed the first time the level is played
+        self.level_platforms = {}
         self.characterReps = {
             "block" : "P"
             ,"worm" : "Q"
@@ -127,6 +41,11 @@ class GameModel():
             ,2: './assets/images/backgrounds/background_3.png'
             ,3: './assets/images/backgrounds/background_4.png'
         }
+        # Provide parallax background layers for a level, as lists of 
+        # (image url, speed) pairs with the opaque base layer first and the 
+        # speed relative to the scrolling of the level. Levels without 
+        # layers use their background image as a single layer.
+        self.levelBackgroundLayers = {}
         # Provides level start images
         self.levelStartImages = {
             0 : './assets/images/backgrounds/splash_screen.png'
@@ -149,6 +68,11 @@ class GameModel():
             ,3 : './models/high_scores/high_scores_4.txt'   
         }
 
+        # Provide the sound effects, these are all decoded once at startup
+        self.soundEffects = {
+            "jump" : './assets/audio/jump.wav'
+        }
+
         # Provide access to pause image, game over image and winning image
         self.pauseImage = './assets/images/backgrounds/paused.png'
         self.gameOverImage = './assets/images/backgrounds/game_over.png'
@@ -166,27 +90,61 @@ class GameModel():
         return self.currentGameLevel + 1
 
     def get_level_platform(self):
-        """Returns level platform design."""
+        """Returns level platform design, as a level source which can be
+        used as a list of row strings or read a chunk of columns at a 
+        time."""
+        if self.currentGameLevel not in self.level_platforms:
+            self.level_platforms[self.currentGameLevel] = LevelSource.LevelSource(
+                self.levelFiles[self.currentGameLevel])
         return self.level_platforms[self.currentGameLevel]
 
+    def add_level(self, levelUrl):
+        """Adds the level in the given level file after the existing levels
+        and returns its level number e.g. for a generated level."""
+        self.levelFiles.append(levelUrl)
+        self.levels.append(len(self.levelFiles))
+        return len(self.levelFiles)
+
     def get_level_background_image(self):
-        """Returns current level background image."""
-        return self.levelBackgroundImages[self.currentGameLevel]
+        """Returns current level background image. Levels without their 
+        own images reuse those of the earlier levels in turn."""
+        return self.levelBackgroundImages[self.currentGameLevel % 
+                                          len(self.levelBackgroundImages)]
+
+    def get_level_background_layers(self):
+        """Returns current level background layers, as a list of (image 
+        url, speed) pairs."""
+        return self.levelBackgroundLayers.get(self.currentGameLevel,
+            [(self.get_level_background_image(), 1.0)])
 
     def get_level_start_image(self):
         """Returns current level start image."""
-        return self.levelStartImages[self.currentGameLevel]
+        return self.levelStartImages[self.currentGameLevel % 
+                                     len(self.levelStartImages)]
 
     def get_level_end_image(self):
         """Returns current level end image."""
-        return self.levelEndImages[self.currentGameLevel]
+        return self.levelEndImages[self.currentGameLevel % 
+                                   len(self.levelEndImages)]
 
     def get_level_score_url(self):
         """Returns current level score file."""
-        return self.levelScoreFiles[self.currentGameLevel]
+        return self.levelScoreFiles.get(self.currentGameLevel,
+            './models/high_scores/high_scores_%d.txt' % self.get_game_level())
 
     def get_char_representations(self, char):
         """Returns specified character's internal representation i.e. the 
         letter used to represent them in the platform designs."""
         return self.characterReps[char]
 
+    def _find_level_files(self, levelsUrl):
+        """Private method. Returns the list of level file urls in the given
+        directory, ordered by their level number. Level files are named
+        level_<number> with either a '.rle' or '.txt' extension."""
+        levelFiles = []
+        for name in os.listdir(levelsUrl):
+            match = re.match(r'level_(\d+)\.(rle|txt)$', name)
+            if match:
+                levelFiles.append((int(match.group(1)), 
+                                   os.path.join(levelsUrl, name)))
+        return [url for number, url in sorted(levelFiles)]
@@ -0,0 +1,72 @@
+import random
+
+# Number of columns in a 1x generated level, the width of the built in levels
+BASE_WIDTH = 209
+# Number of rows in a generated level, the height of the built in levels
+LEVEL_HEIGHT = 21
+# Rows holding the floating coin and block features
+FEATURE_ROWS = (10, 11, 12, 13)
+# Row holding the lower run of coins and platforms above the ground
+LOWER_ROW = 18
+# Row the enemies walk along and the row of the invisible floor below it
+ENEMY_ROW = 19
+FLOOR_ROW = 20
+# Row holding the castle at the end of the level
+CASTLE_ROW = 16
+# Columns kept clear at the start of the level, where the player starts
+START_COLUMNS = 8
+
+class LevelGenerator():
+    """Generates synthetic levels in the game's level design characters,
+    laid out like the built in levels: floating runs of coins and blocks, a
+    lower run above the ground, enemies walking along an invisible floor and
+    the castle at the end. The same seed and settings always produce the same
+    level, so generated levels can be used to compare performance between
+    runs."""
+
+    def __init__(self, seed=0, density=0.5, enemyMix=None, enemyRate=0.05,
+                 coinRatio=0.6):
+        """Set the generation settings. Density is the chance of starting a
+        run of coins or blocks at each column of a feature row, coinRatio the
+        share of runs which are coins rather than blocks and enemyRate the
+        chance of an enemy at each column of the enemy row. The enemy mix is
+        a dictionary of enemy characters to relative weights."""
+        self.seed = seed
+        self.density = density
+        self.enemyMix = enemyMix or {'Q' : 1, 'M' : 1}
+        self.enemyRate = enemyRate
+        self.coinRatio = coinRatio
+
+    def generate(self, width=BASE_WIDTH):
+        """Returns a level of the given number of columns as a list of row
+        strings."""
+        randomiser = random.Random('%s-%s' % (self.seed, width))
+        rows = [[' '] * width for i in range(LEVEL_HEIGHT)]
+        # Floating features and the lower run, leaving room at the start of
+        # the level and before the castle
+        for rowNumber in FEATURE_ROWS + (LOWER_ROW,):
+            column = START_COLUMNS
+            while column < width - START_COLUMNS:
+                if randomiser.random() < self.density:
+                    length = randomiser.randint(2, 8)
+                    tile = 'A' if randomiser.random() < self.coinRatio else 'P'
+                    for i in range(column, min(column + length, width - START_COLUMNS)):
+                        rows[rowNumber][i] = tile
+                    column += length
+                # Always leave a gap between runs
+                column += randomiser.randint(1, 6)
+        # Enemies
+        enemies = list(self.enemyMix.keys())
+        weights = [self.enemyMix[enemy] for enemy in enemies]
+        for column in range(START_COLUMNS * 2, width - START_COLUMNS):
+            if randomiser.random() < self.enemyRate:
+                rows[ENEMY_ROW][column] = randomiser.choices(enemies, weights)[0]
+        # The invisible floor runs the whole length of the level
+        rows[FLOOR_ROW] = ['I'] * width
+        rows[CASTLE_ROW][width - 1] = 'G'
+        return [''.join(row).rstrip() for row in rows]
+
+    def generate_scaled(self, scale):
+        """Returns a level the given multiple of the width of the built in
+        levels."""
+        return self.generate(int(BASE_WIDTH * scale))
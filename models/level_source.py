@@ -0,0 +1,171 @@
+import re
+from array import array
+
+# Number of columns read at a time when a level is streamed in chunks
+CHUNK_COLUMNS = 256
+# Character used for an empty tile in run-length encoded level files
+RLE_EMPTY = '.'
+# A single run in a run-length encoded row: an optional count and a tile
+RLE_RUN = re.compile(r'(\d*)(\D)')
+
+class LevelSource():
+    """Provides the platform design of a single level, read from an external
+    level file. Each line of a level file is one row of the level, using the
+    same characters as the rest of the game. Files ending '.rle' hold run
+    length encoded rows, where each run is an optional count followed by a
+    tile character and '.' is an empty tile e.g. '5.3A' for five empty tiles
+    then three coins. Any other file holds the rows as plain text.
+
+    The file is indexed in a single streaming pass when the source is
+    created, and columns are read in chunks on demand, so the whole level
+    never needs to be held in memory as strings. The source can also be used
+    as a read-only list of row strings, as the level designs were before."""
+
+    def __init__(self, levelUrl):
+        """Index the given level file. For plain text files the position of
+        each row is recorded, for run length encoded files the runs of each
+        row are recorded, neither requiring the level to be expanded."""
+        self.levelUrl = levelUrl
+        self.rle = levelUrl.endswith('.rle')
+        self.rows = None
+        # Plain text rows: byte offset of each row in the file
+        self.rowOffsets = array('Q')
+        # Run length encoded rows: start column and tile of each run
+        self.runStarts = []
+        self.runTiles = []
+        # Number of columns in each row
+        self.rowLengths = array('Q')
+        with open(levelUrl, 'rb') as levelFile:
+            offset = 0
+            for line in levelFile:
+                content = line.rstrip(b'\r\n').decode('ascii')
+                if self.rle:
+                    self._index_rle_row(content)
+                else:
+                    self.rowOffsets.append(offset)
+                    self.rowLengths.append(len(content))
+                offset += len(line)
+        self.height = len(self.rowLengths)
+        self.width = max(self.rowLengths) if self.height else 0
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Returns a source for a level held in memory as a list of row
+        strings e.g. a generated level."""
+        source = cls.__new__(cls)
+        source.levelUrl = None
+        source.rle = False
+        source.rows = list(rows)
+        source.rowLengths = array('Q', (len(row) for row in source.rows))
+        source.height = len(source.rows)
+        source.width = max(source.rowLengths) if source.height else 0
+        return source
+
+    @staticmethod
+    def save(levelUrl, rows):
+        """Writes the given list of row strings to a level file, run length
+        encoding the rows if the file name ends '.rle'."""
+        with open(levelUrl, 'w') as levelFile:
+            for row in rows:
+                if levelUrl.endswith('.rle'):
+                    row = LevelSource.encode_row(row)
+                levelFile.write(row + '\n')
+
+    @staticmethod
+    def encode_row(row):
+        """Returns the run length encoding of a single row string."""
+        runs = []
+        for match in re.finditer(r'(.)\1*', row):
+            tile = match.group(1)
+            if tile == ' ':
+                tile = RLE_EMPTY
+            count = len(match.group(0))
+            runs.append((str(count) if count > 1 else '') + tile)
+        return ''.join(runs)
+
+    def read_columns(self, start, stop):
+        """Returns a list holding the part of each row between the start
+        column and the stop column. As in slicing a string, rows shorter than
+        the stop column give shorter (or empty) strings."""
+        if self.rows is not None:
+            return [row[start:stop] for row in self.rows]
+        if self.rle:
+            return [self._read_rle_columns(i, start, stop)
+                    for i in range(self.height)]
+        columns = []
+        with open(self.levelUrl, 'rb') as levelFile:
+            for i in range(self.height):
+                rowStop = min(stop, self.rowLengths[i])
+                if rowStop <= start:
+                    columns.append('')
+                else:
+                    levelFile.seek(self.rowOffsets[i] + start)
+                    columns.append(levelFile.read(rowStop - start).decode('ascii'))
+        return columns
+
+    def iter_chunks(self, chunkColumns=CHUNK_COLUMNS):
+        """Generates (start column, list of row strings) pairs, reading the
+        level a chunk of columns at a time."""
+        for start in range(0, self.width, chunkColumns):
+            yield start, self.read_columns(start, start + chunkColumns)
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, row):
+        if self.rows is not None:
+            return self.rows[row]
+        if row < 0:
+            row += self.height
+        if not 0 <= row < self.height:
+            raise IndexError(row)
+        if self.rle:
+            return self._read_rle_columns(row, 0, self.rowLengths[row])
+        with open(self.levelUrl, 'rb') as levelFile:
+            levelFile.seek(self.rowOffsets[row])
+            return levelFile.read(self.rowLengths[row]).decode('ascii')
+
+    def __iter__(self):
+        for row in range(self.height):
+            yield self[row]
+
+    def _index_rle_row(self, content):
+        """Private method. Records the start column and tile of each run in
+        a run length encoded row."""
+        starts = array('Q')
+        tiles = []
+        column = 0
+        for count, tile in RLE_RUN.findall(content):
+            starts.append(column)
+            tiles.append(' ' if tile == RLE_EMPTY else tile)
+            column += int(count) if count else 1
+        self.runStarts.append(starts)
+        self.runTiles.append(''.join(tiles))
+        self.rowLengths.append(column)
+
+    def _read_rle_columns(self, row, start, stop):
+        """Private method. Expands the part of a run length encoded row
+        between the start and stop columns."""
+        stop = min(stop, self.rowLengths[row])
+        if stop <= start:
+            return ''
+        starts = self.runStarts[row]
+        tiles = self.runTiles[row]
+        # Binary search for the run holding the start column
+        low, high = 0, len(starts) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if starts[middle] <= start:
+                low = middle
+            else:
+                high = middle - 1
+        parts = []
+        column = start
+        run = low
+        while column < stop:
+            runEnd = starts[run + 1] if run + 1 < len(starts) else self.rowLengths[row]
+            end = min(runEnd, stop)
+            parts.append(tiles[run] * (end - column))
+            column = end
+            run += 1
+        return ''.join(parts)
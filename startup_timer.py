@@ -0,0 +1,52 @@
+from time import perf_counter
+import threading
+
+class StartupTimer():
+    """Records how long each phase of the game's startup takes, up to the
+    first frame being shown, and produces a report breaking the total time
+    down by phase. Phases run in the background are recorded separately, as
+    they don't add to the time to first frame."""
+
+    def __init__(self, startTime=None):
+        """Start timing from the given time (as returned by perf_counter), or
+        from now if no time is given."""
+        if startTime is None:
+            startTime = perf_counter()
+        self.startTime = startTime
+        self.lastTime = startTime
+        # Lists of (phase name, seconds) pairs
+        self.phases = []
+        self.backgroundPhases = []
+        self.lock = threading.Lock()
+
+    def mark(self, phase):
+        """Marks the end of a foreground phase, which is taken to have begun
+        when the previous phase ended."""
+        now = perf_counter()
+        self.phases.append((phase, now - self.lastTime))
+        self.lastTime = now
+
+    def record_background(self, phase, seconds):
+        """Records the duration of a phase run on a background thread."""
+        with self.lock:
+            self.backgroundPhases.append((phase, seconds))
+
+    def get_total(self):
+        """Returns the time in seconds from the start to the last marked
+        phase."""
+        return self.lastTime - self.startTime
+
+    def get_report(self):
+        """Returns the startup report as a printable table."""
+        lines = ['Startup time report', '-' * 40]
+        for phase, seconds in self.phases:
+            lines.append('%-30s %7.1f ms' % (phase, seconds * 1000))
+        lines.append('-' * 40)
+        lines.append('%-30s %7.1f ms' % ('Time to first frame',
+                                         self.get_total() * 1000))
+        with self.lock:
+            backgroundPhases = list(self.backgroundPhases)
+        for phase, seconds in backgroundPhases:
+            lines.append('%-30s %7.1f ms' % (phase + ' (background)',
+                                             seconds * 1000))
+        return '\n'.join(lines)
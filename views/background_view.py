@@ -1,12 +1,86 @@
 # Import all the relevant libraries
 import pygame
+from views import frame_cache as FrameCache
+
+class ParallaxLayer():
+    """A single layer of the scrolling background. The layer's image, scaled
+    to the size of the game window, is tiled twice side by side on to one
+    wrap-around surface when the layer is created, so any part of the
+    scrolling layer is a single rectangle of that surface. The layer moves
+    at its speed multiplied by the distance the background scrolls, and is
+    always drawn at a whole pixel offset. Only the rows of a layer holding
+    visible pixels are drawn, so a layer such as a band of hills over the
+    sky costs no more than the band."""
+
+    def __init__(self, imageUrl, screenSize, speed=1.0, alpha=False):
+        """Build the wrap-around surface. Layers drawn over another layer
+        need alpha, so that the layers beneath show through."""
+        self.speed = speed
+        self.width, self.height = screenSize
+        image = FrameCache.frameCache.get_image(imageUrl, screenSize, alpha)
+        flags = pygame.SRCALPHA if alpha else 0
+        self.tiled = pygame.Surface((self.width * 2, self.height), flags)
+        if alpha:
+            self.tiled = self.tiled.convert_alpha()
+        else:
+            self.tiled = self.tiled.convert()
+        self.tiled.blit(image, (0, 0))
+        self.tiled.blit(image, (self.width, 0))
+        # The rows holding visible pixels, as a rect spanning the screen
+        bounds = image.get_bounding_rect() if alpha else image.get_rect()
+        self.rows = pygame.Rect(0, bounds.top, self.width, bounds.height)
+        # Distance the layer has scrolled and the whole pixel offset of the
+        # left of the screen in the layer's image
+        self.position = 0.0
+        self.offset = 0
+
+    def scroll(self, distance):
+        """Scrolls the layer by the given distance of the background.
+        Returns the number of whole pixels the layer moved."""
+        self.position += distance * self.speed
+        offset = int(self.position) % self.width
+        moved = offset - self.offset
+        # Take the shortest way round the wrap
+        if moved > self.width // 2:
+            moved -= self.width
+        elif moved < -(self.width // 2):
+            moved += self.width
+        self.offset = offset
+        return moved
+
+    def draw(self, surface, rect, destination=None):
+        """Draws the part of the layer under the given screen rect on to the
+        surface, at the given position or at the rect's position."""
+        area = pygame.Rect(rect)
+        if destination is None:
+            destination = area.topleft
+        visible = area.clip(area.left, self.rows.top, area.width, 
+                            self.rows.height)
+        if not visible.height:
+            return
+        destination = (destination[0], 
+                       destination[1] + visible.top - area.top)
+        visible.x += self.offset
+        surface.blit(self.tiled, destination, visible)
 
 class BackgroundImage():
     """Positions and animates the background image for each level.
-    Allows blitting and repositioning the background."""
+    Allows blitting and repositioning the background. The background is
+    made up of one or more parallax layers, the first being the opaque base
+    layer and the rest drawn over it. Each layer scrolls on its own and is
+    drawn straight to the screen from its wrap-around surface at its own
+    offset, so layers moving at different speeds cost a single blit each.
+    The region of the screen changed by the background each frame is
+    recorded, and any part of the background can be restored, so that the
+    background can be used by dirty rectangle rendering."""
 
-    def __init__(self, screenSize, screen, background, eventManager):
-        """ """
+    def __init__(self, screenSize, screen, background, eventManager,
+                 layers=None, driftSpeed=0.5):
+        """Register with the Event Manager and build the background's
+        layers. Layers is a list of (image url, speed) pairs for parallax
+        layers; if not given the background image is used as a single
+        layer moving at full speed. The drift speed is the distance the 
+        background moves each frame when the level isn't scrolling."""
         # Register as event manager subscriber
         self.eventManager = eventManager
         self.eventManager.register_listener(self)
@@ -14,50 +88,55 @@ class BackgroundImage():
 
         self.width, self.height = screenSize
         self.screen = screen
-        # x is horizontal, y is vertical
-        # 0 represents top left coordinate for first background and 1 
-        # represents top left coordinate for second background
-        self.x0 = 0
-        self.y0 = 0
-        self.x1 = self.width
-        self.y1 = 0
-        # Load the background in using pygame and scale it to the size of the
-        # game window
-        background = pygame.image.load(background)
-        background = background.convert()
-        background = pygame.transform.scale(background, screenSize)
-        # Bind the background to the object 'background' property
-        self.background = background
-
-    def reposition_background(self):
-        """Repositions background. Speed increases if the player 
-        sprite is to the far sides of the game to create the illusion that 
-        they are moving through the platform."""
-        # Move slowly if at the left hand side 
+        self.driftSpeed = driftSpeed
+        self.screenRect = pygame.Rect((0, 0), screenSize)
+        if not layers:
+            layers = [(background, 1.0)]
+        self.layers = [ParallaxLayer(imageUrl, screenSize, speed, i > 0)
+                       for i, (imageUrl, speed) in enumerate(layers)]
+        # The part of the screen whose background changed in the last frame
+        self.dirtyRect = None
+
+    def update(self):
+        """Moves the background for the current event, without drawing it.
+        Speed increases if the player sprite is to the far sides of the 
+        game to create the illusion that they are moving through the 
+        platform."""
+        # Move slowly if at the left hand side
         if self.event == ["CHARACTER_AT_LEFT"]:
-            # print(event)
-            self.x1 += 0.01
-            self.x0 += 0.01
+            distance = -0.01
         # Move fast if at the right hand side
         elif self.event == ["CHARACTER_AT_RIGHT"]:
-            self.x1 -= 11.0
-            self.x0 -= 11.0
+            distance = 11.0
         # Default rate of movement
         else:
-            self.x1 -= 0.5
-            self.x0 -=0.5
-        # Actually reposition the background on the screen here
-        self.screen.blit(self.background,(self.x0,self.y0))
-        self.screen.blit(self.background,(self.x1,self.y1))
-
-        # Prepare for the next iteration
-        if self.x0 < -self.width:
-            self.x0 = +self.width
-        if self.x1 < -self.width:
-            self.x1 = +self.width
+            distance = self.driftSpeed
+        self.scroll(distance)
         # Reset the event property
         self.event = None
 
+    def scroll(self, distance):
+        """Scrolls every layer by the given distance and records the part 
+        of the screen whose background changed."""
+        moves = [layer.scroll(distance) for layer in self.layers]
+        self.dirtyRect = self.screenRect if any(moves) else None
+
+    def draw(self, surface):
+        """Draws the whole background on to the surface."""
+        self.restore(surface, self.screenRect)
+
+    def restore(self, surface, rect):
+        """Draws the background under the given screen rect on to the
+        surface e.g. to erase a sprite."""
+        rect = self.screenRect.clip(rect)
+        for layer in self.layers:
+            layer.draw(surface, rect)
+
+    def get_dirty_rect(self):
+        """Returns the part of the screen whose background changed in the
+        last frame, or None if the background didn't change."""
+        return self.dirtyRect
+
     def notify_event(self, event):
         """Attaches any current event to this objects 'event' property."""
         self.event = event
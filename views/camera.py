@@ -0,0 +1,160 @@
+import pygame
+from views import spatial_grid as SpatialGrid
+
+# Distance in pixels the camera moves for each scroll event
+SCROLL_STEP = 10
+# Distance in pixels beyond the screen within which sprites are still drawn
+CULL_MARGIN = 32
+# Furthest distance in pixels a sprite can move in one step and still be 
+# drawn between its positions, rather than jumping e.g. when it's reused
+INTERPOLATE_LIMIT = 64
+
+class Camera():
+    """The part of the level's world shown on the screen. The level's sprites
+    keep their positions in world coordinates and the camera holds the
+    single horizontal offset between the world and the screen, so scrolling
+    the level only ever moves the camera. Sprites are translated to the
+    screen when they are drawn and the player is translated into the world
+    when checking for collisions. The level is drawn with the camera at its
+    render position, which can be between its last two positions when frames
+    are drawn between simulation steps."""
+
+    def __init__(self, scrollStep=SCROLL_STEP):
+        """Start the camera at the left of the world."""
+        self.scrollStep = scrollStep
+        # World x coordinate shown at the left of the screen
+        self.x = 0
+        # Distance the camera moved in the last scroll
+        self.step = 0
+        # World x coordinate before the last scroll and the world x 
+        # coordinate the level is drawn at
+        self.previousX = 0
+        self.renderX = 0
+
+    def scroll(self, event):
+        """Moves the camera for the given event. Returns True if the camera
+        moved."""
+        if event == ["CHARACTER_AT_RIGHT"]:
+            self.step = self.scrollStep
+        elif event == ["CHARACTER_AT_LEFT"]:
+            self.step = -self.scrollStep
+        else:
+            self.step = 0
+        self.previousX = self.x
+        self.x += self.step
+        self.renderX = self.x
+        return self.step != 0
+
+    def interpolate(self, alpha):
+        """Sets the render position to the given fraction of the way from the
+        camera's position before the last scroll to its current position."""
+        self.renderX = int(round(self.previousX + 
+                                 (self.x - self.previousX) * alpha))
+
+    def to_screen(self, rect):
+        """Returns a copy of a rect in world coordinates moved to screen
+        coordinates."""
+        return rect.move(-self.x, 0)
+
+    def to_world(self, rect):
+        """Returns a copy of a rect in screen coordinates moved to world
+        coordinates."""
+        return rect.move(self.x, 0)
+
+class CullingGroup(pygame.sprite.Group):
+    """A sprite group which only draws the sprites near the screen. Before 
+    drawing, the sprites whose images lie outside the screen rect, grown by
+    a margin, are culled so they never reach the blitter. The number of 
+    sprites drawn and culled the last time the group was culled are kept 
+    for instrumentation. The sprites' positions can be stored before each 
+    simulation step, so they can be drawn between their last two 
+    positions. The sprites of a static group never move, so they are also
+    kept in a spatial grid for finding the sprites near a rect."""
+
+    def __init__(self, *sprites, cullMargin=CULL_MARGIN, static=False):
+        """Set the cull margin and add any sprites given, indexing them in
+        a spatial grid if the group is static."""
+        self.cullMargin = cullMargin
+        self.grid = SpatialGrid.SpriteGrid() if static else None
+        self.drawnCount = 0
+        self.culledCount = 0
+        # Dictionary of sprites to their positions before the last step, and
+        # the fraction of the way from there to their current positions the
+        # sprites are drawn at
+        self.previous = {}
+        self.alpha = 1.0
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        """Adds a sprite to the group and to the grid of a static group."""
+        super().add_internal(sprite, layer)
+        if self.grid is not None:
+            self.grid.add(sprite)
+
+    def remove_internal(self, sprite):
+        """Removes a sprite from the group and from the grid of a static 
+        group."""
+        super().remove_internal(sprite)
+        if self.grid is not None:
+            self.grid.remove(sprite)
+
+    def get_nearby_sprites(self, rect):
+        """Returns a list of the sprites which could collide with something
+        within the rect i.e. those whose bounds overlap it. A static group
+        only looks at the sprites in the grid cells around the rect."""
+        if self.grid is not None:
+            return self.grid.query(rect)
+        return [sprite for sprite in self.sprites() 
+                if rect.colliderect(SpatialGrid.get_bounds(sprite))]
+
+    def store_positions(self):
+        """Stores the position of every sprite before a simulation step and 
+        draws the sprites at their current positions until interpolated."""
+        self.previous = dict((sprite, sprite.rect.topleft) for sprite in 
+                             self.sprites())
+        self.alpha = 1.0
+
+    def get_offset(self):
+        """Returns the horizontal distance from a sprite's position to its
+        position on the screen."""
+        return 0
+
+    def get_visible_sprites(self, screenRect):
+        """Returns a list of (sprite, screen rect) pairs for the sprites 
+        whose images overlap the screen rect grown by the cull margin, where
+        the rect is the area of the screen covered by the sprite's image."""
+        view = screenRect.inflate(self.cullMargin * 2, self.cullMargin * 2)
+        offset = self.get_offset()
+        visible = []
+        for sprite in self.sprites():
+            x, y = sprite.rect.topleft
+            if self.alpha < 1.0 and sprite in self.previous:
+                previousX, previousY = self.previous[sprite]
+                if (abs(x - previousX) + abs(y - previousY) <= 
+                    INTERPOLATE_LIMIT):
+                    x = int(round(previousX + (x - previousX) * self.alpha))
+                    y = int(round(previousY + (y - previousY) * self.alpha))
+            rect = pygame.Rect(x + offset, y, *sprite.image.get_size())
+            if view.colliderect(rect):
+                visible.append((sprite, rect))
+        self.drawnCount = len(visible)
+        self.culledCount = len(self) - len(visible)
+        return visible
+
+    def draw(self, surface):
+        """Draws the sprites near the screen on to the surface."""
+        for sprite, rect in self.get_visible_sprites(surface.get_rect()):
+            surface.blit(sprite.image, rect)
+
+class CameraGroup(CullingGroup):
+    """A sprite group of sprites positioned in world coordinates, which are
+    drawn at their position relative to the camera."""
+
+    def __init__(self, camera, *sprites, static=False):
+        """Bind the camera to the group and add any sprites given."""
+        self.camera = camera
+        super().__init__(*sprites, static=static)
+
+    def get_offset(self):
+        """Returns the distance from the world to the screen."""
+        return -self.camera.renderX
@@ -0,0 +1,68 @@
+import pygame
+
+class DirtyRectTracker():
+    """Works out which parts of the window changed between frames, for dirty
+    rectangle rendering. Like pygame's LayeredDirty group it remembers where
+    each sprite was drawn and with which image, so a sprite which moved,
+    animated, appeared or disappeared marks both its old and new areas as
+    dirty. Other changed areas, such as HUD text, are added by the caller.
+    Overlapping areas are merged, and when the background has changed or
+    the dirty areas cover too much of the window the whole window should be
+    redrawn instead."""
+
+    def __init__(self, screenSize, maxDirtyArea=0.5):
+        """Set the size of the window and the largest share of it which is
+        redrawn in parts before falling back to redrawing all of it."""
+        self.screenRect = pygame.Rect((0, 0), screenSize)
+        self.maxArea = screenSize[0] * screenSize[1] * maxDirtyArea
+        # Dictionary of sprites to the (rect, image) they were drawn with
+        self.lastDrawn = {}
+        # False until a whole frame has been drawn
+        self.valid = False
+
+    def invalidate(self):
+        """Notes that the window was drawn over by something else e.g. a
+        full screen image, so the next frame is drawn in full."""
+        self.valid = False
+
+    def track(self, drawnSprites, changedRects, fullRedraw=False):
+        """Compares the given (sprite, screen rect) pairs about to be drawn
+        with those of the last frame. Returns the list of merged rects to
+        redraw and present, or None if the whole window should be redrawn,
+        which is the case if fullRedraw is True e.g. the background moved."""
+        rects = [pygame.Rect(rect) for rect in changedRects]
+        drawn = {}
+        for sprite, rect in drawnSprites:
+            state = (tuple(rect), sprite.image)
+            drawn[sprite] = state
+            lastState = self.lastDrawn.pop(sprite, None)
+            if lastState != state:
+                rects.append(rect)
+                if lastState:
+                    rects.append(pygame.Rect(lastState[0]))
+        # Sprites which were drawn last frame but not this one
+        for lastRect, image in self.lastDrawn.values():
+            rects.append(pygame.Rect(lastRect))
+        self.lastDrawn = drawn
+        if fullRedraw or not self.valid:
+            self.valid = True
+            return None
+        rects = self._merge([self.screenRect.clip(rect) for rect in rects])
+        if sum(rect.width * rect.height for rect in rects) > self.maxArea:
+            return None
+        return rects
+
+    def _merge(self, rects):
+        """Private method. Returns the given rects with empty rects dropped
+        and overlapping rects joined together."""
+        merged = []
+        for rect in sorted(rects, key=lambda rect: rect.x):
+            if not rect.width or not rect.height:
+                continue
+            for mergedRect in merged:
+                if mergedRect.colliderect(rect):
+                    mergedRect.union_ip(rect)
+                    break
+            else:
+                merged.append(rect.copy())
+        return merged
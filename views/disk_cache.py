@@ -0,0 +1,239 @@
+import atexit
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import pygame
+
+# Layout of the pixel buffers held in the cache. This is the usual 32 bit
+# layout of the display on little endian machines, so converting a surface
+# built from the buffer to the display format is a straight copy.
+BUFFER_FORMAT = 'BGRA'
+# Each cache file starts with the layout of its pixel buffer and the width
+# and height of the buffered image
+HEADER = struct.Struct('<4sII')
+# Name of the file in the cache directory holding the index of source file
+# hashes
+INDEX_NAME = 'index.json'
+
+class DiskCache():
+    """An on-disk cache of decoded, scaled pixel buffers for the game's image
+    assets. Entries are keyed by a hash of the source file's contents, the
+    alpha flag and the target size, so an entry is rebuilt automatically when
+    its asset changes. On a hit the buffer is memory mapped and the surface
+    built straight from it, skipping the PNG decode and the scale. If the
+    cache directory can't be written the cache is disabled and images are
+    decoded as normal.
+
+    The hash of each source file is kept in an index in the cache directory
+    along with the file's modified time and size, so later runs only hash a
+    file again once it has changed. When a file's hash changes, the entries
+    for its old contents are deleted."""
+
+    def __init__(self, cacheUrl='./.asset_cache'):
+        """Set the cache directory. The index of source file hashes is read
+        from it on first use."""
+        self.cacheUrl = cacheUrl
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        # Dictionary of source urls to [modified time, file size, hash]
+        # lists, or None until the index has been read
+        self.index = None
+        # Whether the index has changed since it was last saved
+        self.indexChanged = False
+        # The index is used by both the main thread and the level 
+        # prefetcher. Saving it has a lock of its own, so the index can be
+        # used while it is written.
+        self.lock = threading.Lock()
+        self.writeLock = threading.Lock()
+
+    def load_image(self, sourceUrl, alpha=False, size=None, decoded=None):
+        """Returns the image at the given url, converted to the display
+        format and scaled to the given size if any. The image comes from the
+        cache if it holds an entry for the current contents of the file,
+        otherwise it is decoded (or taken from the given already decoded
+        surface) and written to the cache for next time."""
+        cachePath = self._get_cache_path(sourceUrl, alpha, size)
+        if cachePath and os.path.isfile(cachePath):
+            try:
+                image = self._read(cachePath, alpha)
+                self.hits += 1
+                return image
+            except Exception:
+                # A damaged entry is simply replaced below
+                pass
+        self.misses += 1
+        image = decoded if decoded is not None else pygame.image.load(sourceUrl)
+        if alpha:
+            image = image.convert_alpha()
+        else:
+            image = image.convert()
+        if size:
+            image = pygame.transform.scale(image, size)
+        if cachePath:
+            self._write(cachePath, image)
+        return image
+
+    def is_cached(self, sourceUrl, alpha=False, size=None):
+        """Returns True if the cache holds an entry for the current contents
+        of the source file at the given size."""
+        cachePath = self._get_cache_path(sourceUrl, alpha, size)
+        return bool(cachePath) and os.path.isfile(cachePath)
+
+    def clear(self):
+        """Deletes every entry in the cache directory, and its index."""
+        with self.lock:
+            self.index = {}
+            self.indexChanged = False
+            if os.path.isdir(self.cacheUrl):
+                for name in os.listdir(self.cacheUrl):
+                    if (name.endswith('.' + BUFFER_FORMAT.lower()) or 
+                        name == INDEX_NAME):
+                        os.remove(os.path.join(self.cacheUrl, name))
+
+    def _get_cache_path(self, sourceUrl, alpha, size):
+        """Private method. Returns the path of the cache entry for the
+        current contents of the source file, or None if the cache is
+        disabled or the file can't be read."""
+        if not self.enabled:
+            return None
+        try:
+            sourceHash = self._get_hash(sourceUrl)
+        except OSError:
+            return None
+        name = '%s-%s-%s.%s' % (sourceHash,
+                                'x'.join(str(i) for i in size) if size else 'native',
+                                'alpha' if alpha else 'opaque',
+                                BUFFER_FORMAT.lower())
+        return os.path.join(self.cacheUrl, name)
+
+    def _get_hash(self, sourceUrl):
+        """Private method. Returns the hash of the source file's contents.
+        The file is only read and hashed if the index doesn't hold a hash 
+        for its current modified time and size. A new hash is added to the
+        index, which is saved by flush, and if it replaces an old one which
+        no other file has, the entries for the old contents are deleted. 
+        Only the index itself is used while holding the lock, so hashing a
+        file never holds up the other thread."""
+        stat = os.stat(sourceUrl)
+        key = os.path.normpath(sourceUrl)
+        with self.lock:
+            if self.index is None:
+                self.index = self._read_index()
+            record = self.index.get(key)
+        if record and record[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return record[2]
+        with open(sourceUrl, 'rb') as sourceFile:
+            sourceHash = hashlib.sha1(sourceFile.read()).hexdigest()
+        with self.lock:
+            self.index[key] = [stat.st_mtime_ns, stat.st_size, sourceHash]
+            self.indexChanged = True
+            superseded = (record and record[2] != sourceHash and
+                          not any(i[2] == record[2] 
+                                  for i in self.index.values()))
+        if superseded:
+            self._delete_entries(record[2])
+        return sourceHash
+
+    def flush(self):
+        """Saves the index to the cache directory, if it has changed since
+        it was last saved. Called once a batch of images has been loaded, 
+        such as a level's, and when the game exits."""
+        with self.lock:
+            if not self.indexChanged:
+                return
+            index = dict(self.index)
+            self.indexChanged = False
+        with self.writeLock:
+            self._write_index(index)
+
+    def _read_index(self):
+        """Private method. Returns the index saved in the cache directory, 
+        or an empty index if there isn't one or it can't be read."""
+        try:
+            with open(os.path.join(self.cacheUrl, INDEX_NAME)) as indexFile:
+                index = json.load(indexFile)
+            if isinstance(index, dict):
+                return index
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _write_index(self, index):
+        """Private method. Saves the given index to the cache directory, 
+        disabling the cache if the directory can't be written."""
+        try:
+            if not os.path.isdir(self.cacheUrl):
+                os.makedirs(self.cacheUrl)
+            indexPath = os.path.join(self.cacheUrl, INDEX_NAME)
+            with open(indexPath + '.tmp', 'w') as indexFile:
+                json.dump(index, indexFile)
+            os.replace(indexPath + '.tmp', indexPath)
+        except OSError:
+            self.enabled = False
+
+    def _delete_entries(self, sourceHash):
+        """Private method. Deletes every entry for the source contents with
+        the given hash, whatever their size and alpha flag."""
+        if not os.path.isdir(self.cacheUrl):
+            return
+        for name in os.listdir(self.cacheUrl):
+            if (name.startswith(sourceHash + '-') and
+                name.endswith('.' + BUFFER_FORMAT.lower())):
+                try:
+                    os.remove(os.path.join(self.cacheUrl, name))
+                except OSError:
+                    pass
+
+    def _read(self, cachePath, alpha):
+        """Private method. Memory maps a cache entry and builds the surface
+        from its buffer. Entries whose pixel buffer isn't in the expected
+        layout, or is the wrong length, are rejected."""
+        with open(cachePath, 'rb') as cacheFile:
+            mapped = mmap.mmap(cacheFile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            bufferFormat, width, height = HEADER.unpack_from(mapped)
+            if (bufferFormat != BUFFER_FORMAT.encode('ascii') or
+                len(mapped) != HEADER.size + width * height * 4):
+                raise ValueError('Cache entry is in a different format')
+            buffer = memoryview(mapped)[HEADER.size:]
+            try:
+                image = pygame.image.frombuffer(buffer, (width, height),
+                                                BUFFER_FORMAT)
+                # Copy the pixels out of the mapped file into a surface of
+                # the display format, so the file can be closed
+                if alpha:
+                    converted = image.convert_alpha()
+                else:
+                    converted = image.convert()
+                del image
+            finally:
+                buffer.release()
+        finally:
+            mapped.close()
+        return converted
+
+    def _write(self, cachePath, image):
+        """Private method. Writes the image's pixel buffer to the cache,
+        disabling the cache if the directory can't be written."""
+        try:
+            if not os.path.isdir(self.cacheUrl):
+                os.makedirs(self.cacheUrl)
+            # Write to a temporary file first, so a half written entry is
+            # never read
+            temporaryPath = cachePath + '.tmp'
+            with open(temporaryPath, 'wb') as cacheFile:
+                cacheFile.write(HEADER.pack(BUFFER_FORMAT.encode('ascii'),
+                                            *image.get_size()))
+                cacheFile.write(pygame.image.tobytes(image, BUFFER_FORMAT))
+            os.replace(temporaryPath, cachePath)
+        except OSError:
+            self.enabled = False
+
+# The single disk cache shared by the whole game, whose index is saved when
+# the game exits
+diskCache = DiskCache()
+atexit.register(diskCache.flush)
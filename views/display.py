@@ -0,0 +1,60 @@
+import pygame
+
+# Default size of the game window, which is also the size the game is
+# drawn at unless an internal resolution is given
+WINDOW_SIZE = (1366, 768)
+
+class Display():
+    """The game window, which is created once and kept for the whole game so
+    that starting or restarting a level never re-creates the video surface.
+    The game is drawn on to a surface at the internal resolution. If this
+    differs from the window size, the surface is scaled to the window once
+    when each frame is presented, so the game can be drawn at a lower
+    resolution than it is shown at. Sprites keep their size in pixels of
+    the internal resolution."""
+
+    def __init__(self, windowSize=WINDOW_SIZE, resolution=None,
+                 fullScreen=False):
+        """Open the game window at the given size and create the surface the
+        game is drawn on, at the internal resolution if one is given."""
+        self.windowSize = tuple(windowSize)
+        self.size = tuple(resolution) if resolution else self.windowSize
+        flags = pygame.FULLSCREEN if fullScreen else 0
+        self.window = pygame.display.set_mode(self.windowSize, flags)
+        if self.size == self.windowSize:
+            # Draw straight on to the window
+            self.surface = self.window
+        else:
+            self.surface = pygame.Surface(self.size).convert()
+        self.scaleX = self.windowSize[0] / self.size[0]
+        self.scaleY = self.windowSize[1] / self.size[1]
+
+    def present(self, rects=None):
+        """Shows the drawn frame in the window. If a list of rects is given,
+        only those parts of the frame are scaled and shown."""
+        if self.surface is self.window:
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+        elif rects is None:
+            pygame.transform.scale(self.surface, self.windowSize, self.window)
+            pygame.display.flip()
+        else:
+            windowRects = [self._scale_rect(rect) for rect in rects]
+            pygame.display.update(windowRects)
+
+    def _scale_rect(self, rect):
+        """Private method. Scales the given rect of the drawn frame on to the
+        window, returning the rect of the window it covers. The rect is
+        grown by a pixel, so that neighbouring rects join up once scaled."""
+        rect = self.surface.get_rect().clip(pygame.Rect(rect).inflate(2, 2))
+        left = int(rect.left * self.scaleX)
+        top = int(rect.top * self.scaleY)
+        right = int(rect.right * self.scaleX + 0.999)
+        bottom = int(rect.bottom * self.scaleY + 0.999)
+        windowRect = pygame.Rect(left, top, right - left, bottom - top)
+        self.window.blit(pygame.transform.scale(self.surface.subsurface(rect),
+                                                windowRect.size),
+                         windowRect)
+        return windowRect
@@ -0,0 +1,260 @@
+import os
+import weakref
+import pygame
+from collections.abc import Mapping
+from easypg.sprites import Sprite
+from views import texture_atlas as TextureAtlas
+from views import disk_cache as DiskCache
+
+class FrameCache():
+    """A process-wide store of sprite frames and single images, such as the
+    full screen splash, pause and game over images. Frames are loaded from an
+    asset directory once and kept, keyed by the asset directory, the alpha 
+    flag and the target size, so that every sprite (and every rebuild of a 
+    level view) built from the same assets shares the same surfaces instead
+    of decoding them from disk again. The collision mask of every frame is
+    built when the frame is decoded, so sprites can switch masks along with
+    their frames rather than building them when testing for collisions.
+    Hit and miss counts are kept to allow the effectiveness of the cache to
+    be checked."""
+
+    def __init__(self):
+        """Initialise empty frame and image stores and zero the hit and miss
+        counters."""
+        # Dictionary of (assetUrl, alpha, size) keys to animation sets
+        self.frames = {}
+        # Dictionary of (imageUrl, alpha, size) keys to single surfaces
+        self.images = {}
+        # Dictionary of image urls to surfaces decoded ahead of time, but not
+        # yet converted to the display format
+        self.decoded = {}
+        # Dictionary of (assetUrl, size, state, direction) keys to (surface,
+        # unscaled size) pairs, for single frames shared by static objects
+        self.sharedFrames = {}
+        # Dictionary of frame surfaces to their collision masks. Masks are
+        # dropped along with their frames when the frames are evicted.
+        self.masks = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def get_images(self, assetUrl, alpha=False, size=None, preload=None):
+        """Returns the image store for the given asset directory, in the
+        same format used by easypg sprites i.e. states, each holding
+        directions, each holding a list of surfaces. The frames for a state
+        and direction are decoded (and scaled to the given size, if any) the
+        first time they are used. A list of states, or (state, direction)
+        pairs, can be given as a preload hint to decode them straight away.
+        The returned store is shared and must not be modified by the
+        caller."""
+        key = (os.path.normpath(assetUrl), alpha, size)
+        if key in self.frames:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.frames[key] = AnimationSet(assetUrl, alpha, size, self.masks)
+        if preload:
+            self.frames[key].preload(preload)
+        return self.frames[key]
+
+    def get_image(self, imageUrl, size=None, alpha=False):
+        """Returns the single image at the given url, converted to the 
+        display format and scaled to the given size if any. The image is 
+        decoded and scaled on the first request only, so it can be blitted
+        every frame without further cost. The returned surface is shared 
+        and must not be modified by the caller."""
+        key = (os.path.normpath(imageUrl), alpha, size)
+        if key in self.images:
+            self.hits += 1
+        else:
+            self.misses += 1
+            decoded = self.decoded.pop(os.path.normpath(imageUrl), None)
+            self.images[key] = DiskCache.diskCache.load_image(imageUrl, alpha,
+                                                              size, decoded)
+        return self.images[key]
+
+    def get_shared_frame(self, assetUrl, size, state, direction):
+        """Returns the first frame of the given state and direction of an
+        asset directory, scaled to the given size, along with the size of
+        the unscaled frame. Used by static objects, which all share the
+        one surface. Both frames are taken from the cached animation sets
+        the first time they are requested."""
+        key = (os.path.normpath(assetUrl), size, state, direction)
+        if key not in self.sharedFrames:
+            source = self.get_images(assetUrl, True)[state][direction][0]
+            scaled = self.get_images(assetUrl, True, size)[state][direction][0]
+            self.sharedFrames[key] = (scaled, source.get_size())
+        return self.sharedFrames[key]
+
+    def get_mask(self, surface):
+        """Returns the collision mask of the given surface. The masks of 
+        cached frames are built when the frames are decoded; the mask of any
+        other surface is built on the first request."""
+        mask = self.masks.get(surface)
+        if mask is None:
+            mask = pygame.mask.from_surface(surface)
+            self.masks[surface] = mask
+        return mask
+
+    def decode_image(self, imageUrl, size=None, alpha=False):
+        """Decodes the single image at the given url ahead of time, without
+        converting it to the display format. This is safe to call from a 
+        worker thread; the next call to get_image for the url will then only
+        need to convert and scale the image on the main thread. Nothing is
+        decoded if the disk cache already holds the image at the given 
+        size."""
+        key = os.path.normpath(imageUrl)
+        if (key not in self.decoded and 
+            (key, alpha, size) not in self.images and
+            not DiskCache.diskCache.is_cached(imageUrl, alpha, size)):
+            self.decoded[key] = pygame.image.load(imageUrl)
+
+    def evict(self, assetUrl=None):
+        """Removes the frames for the given asset directory, or the given 
+        single image, from the cache whatever their alpha flag or size. If 
+        no url is given the whole cache is emptied. Useful once a level's 
+        unique assets are no longer needed."""
+        if assetUrl is None:
+            self.frames.clear()
+            self.images.clear()
+            self.decoded.clear()
+            self.sharedFrames.clear()
+        else:
+            assetUrl = os.path.normpath(assetUrl)
+            self.decoded.pop(assetUrl, None)
+            for store in (self.frames, self.images, self.sharedFrames):
+                for key in [key for key in store if key[0] == assetUrl]:
+                    del store[key]
+
+    def get_stats(self):
+        """Returns a dictionary of the current hit count, miss count, number
+        of cached entries, number of frames decoded into memory and number 
+        of collision masks."""
+        return {'hits' : self.hits,
+                'misses' : self.misses,
+                'entries' : len(self.frames) + len(self.images),
+                'frames' : sum(animationSet.get_loaded_count()
+                               for animationSet in self.frames.values()),
+                'masks' : len(self.masks)}
+
+class AnimationSet(Mapping):
+    """A lazily loaded image store for a single asset directory. Behaves as
+    the read-only dictionary of states expected by easypg sprites, but a
+    state's frames for a direction are only decoded when that direction is
+    first requested. Frames are read from the directory's texture atlas if
+    one has been built, otherwise from the loose frame files."""
+
+    def __init__(self, assetUrl, alpha=False, size=None, masks=None):
+        """Find the states and directions available for the asset directory
+        without decoding any frames. If a store of masks is given, the 
+        collision mask of each frame is added to it as the frame is 
+        decoded."""
+        if TextureAtlas.TextureAtlas.exists(assetUrl):
+            self.source = TextureAtlas.TextureAtlas(assetUrl)
+        else:
+            self.source = LooseFrames(assetUrl)
+        self.states = dict(
+            (state, StateFrames(self.source, state, directions, alpha, size,
+                                masks))
+            for state, directions in self.source.get_frame_index().items())
+
+    def __getitem__(self, state):
+        return self.states[state]
+
+    def __iter__(self):
+        return iter(self.states)
+
+    def __len__(self):
+        return len(self.states)
+
+    def preload(self, hints):
+        """Decodes the frames given by the hints straight away. Each hint is
+        either a state, to load every direction of that state, or a (state,
+        direction) pair. Hints for unavailable frames are ignored."""
+        for hint in hints:
+            if isinstance(hint, str):
+                if hint in self.states:
+                    for direction in self.states[hint]:
+                        self.states[hint][direction]
+            elif hint[0] in self.states and hint[1] in self.states[hint[0]]:
+                self.states[hint[0]][hint[1]]
+
+    def get_loaded_count(self):
+        """Returns the number of frames currently decoded."""
+        return sum(state.get_loaded_count() for state in self.states.values())
+
+class StateFrames(Mapping):
+    """The directions available for one state of an AnimationSet. Each
+    direction's animation sequence is decoded on first access."""
+
+    def __init__(self, source, state, directions, alpha, size, masks=None):
+        """Record where the frames come from without decoding them."""
+        self.source = source
+        self.masks = masks
+        self.state = state
+        self.directions = directions
+        self.alpha = alpha
+        self.size = size
+        # Dictionary of direction keys to decoded animation sequences
+        self.sequences = {}
+
+    def __getitem__(self, direction):
+        if direction not in self.sequences:
+            if direction not in self.directions:
+                raise KeyError(direction)
+            self.sequences[direction] = self.source.load_frames(
+                self.state, direction, self.alpha, self.size)
+            # Build the frames' collision masks while loading the frames
+            if self.masks is not None:
+                for image in self.sequences[direction]:
+                    self.masks[image] = pygame.mask.from_surface(image)
+        return self.sequences[direction]
+
+    def __iter__(self):
+        return iter(self.directions)
+
+    def __len__(self):
+        return len(self.directions)
+
+    def get_loaded_count(self):
+        """Returns the number of frames currently decoded."""
+        return sum(len(sequence) for sequence in self.sequences.values())
+
+class LooseFrames():
+    """Frame source for a directory of loose frame files, named using the
+    easypg file naming convention ([state]_[direction]_[num])."""
+
+    def __init__(self, assetUrl):
+        """Scan the directory for frame file names, without decoding them."""
+        self.assetUrl = assetUrl
+        # Dictionary of state keys to dictionaries of direction keys to
+        # lists of frame file names
+        self.names = {}
+        for name in sorted(os.listdir(assetUrl)):
+            match = Sprite.image_regexp.match(name)
+            if match:
+                state = match.group(1) or '-'
+                direction = match.group(2) or '-'
+                self.names.setdefault(state, {}).setdefault(direction, []).append(name)
+
+    def get_frame_index(self):
+        """Returns a dictionary of each state in the directory against a list
+        of the directions available for that state."""
+        return dict((state, list(directions))
+                    for state, directions in self.names.items())
+
+    def load_frames(self, state, direction, alpha=False, size=None):
+        """Decodes the animation sequence for the given state and direction
+        and returns it as a list of surfaces."""
+        frames = []
+        for name in self.names[state][direction]:
+            image = DiskCache.diskCache.load_image(
+                os.path.join(self.assetUrl, name), alpha, size)
+            if not alpha:
+                # Make the background transparent, taking the colour of the
+                # top left pixel as the background colour as easypg does
+                image.set_colorkey(image.get_at((0, 0)))
+            frames.append(image)
+        return frames
+
+# The single frame cache shared by the whole game
+frameCache = FrameCache()
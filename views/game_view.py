@@ -1,20 +1,56 @@
 import pygame
 from views import level_view as PrimaryView
+from views import level_prefetch as LevelPrefetch
+from views import display as Display
+from views import disk_cache as DiskCache
+
+# Number of simulation steps a second. The game's physics, enemy speeds and 
+# scrolling all move a set distance each step, and are tuned for this rate.
+SIMULATION_RATE = 150
+# Most simulation steps run for one drawn frame. If the game falls further 
+# behind than this, it slows down rather than never catching up.
+MAX_STEPS_PER_FRAME = 8
 
 class GameView():
     """Generates the game and spawns subviews for individual levels as the 
     player enters the corresponding level. Responsible for the overall control 
     flow of the game views, ordering of levels, display of splash screens and game over screens."""
 
-    def __init__(self, clock, model, controller, eventManager):
+    def __init__(self, clock, model, controller, eventManager, startupTimer=None,
+                 dirtyRendering=False, presenting=True, drawing=True,
+                 simulationRate=SIMULATION_RATE, renderRate=SIMULATION_RATE,
+                 windowSize=Display.WINDOW_SIZE, resolution=None):
         """Binds the model instance, controller instance, clock and Event 
-        Manager to the game view."""
-        # Bind Event Manager controller, level view and clock to object
+        Manager to the game view. If a startup timer is given, the first 
+        level build and first frame are marked on it and its report is 
+        printed once the first frame has been shown. With dirty rendering 
+        the levels only redraw and present the parts of the window which 
+        change each frame. When running headless, frames aren't presented
+        and drawing may be skipped altogether. The level is simulated in 
+        fixed steps at the simulation rate, while frames are drawn at up to
+        the render rate. The game window is opened once, at the window size,
+        and the game is drawn at the internal resolution if one is given."""
+        # Bind Event Manager controller and clock to object. The level view
+        # is created when each level starts
         self.eventManager = eventManager
         self.model = model
-        self.view = PrimaryView.PrimaryView(self.model, self.eventManager)
+        self.view = None
+        self.startupTimer = startupTimer
+        self.dirtyRendering = dirtyRendering
+        self.presenting = presenting
+        self.drawing = drawing
+        self.timestep = 1.0 / simulationRate
+        self.renderRate = renderRate
         self.controller = controller
         self.clock = clock
+        # The display is kept for the whole game and shared by every level
+        self.display = Display.Display(windowSize, resolution)
+        # The prefetcher prepares the next level in the background while 
+        # the end screen of the current level is displayed
+        self.prefetcher = LevelPrefetch.LevelPrefetcher(self.model,
+                                                        self.display.size)
+        # Begin preparing the first level straight away, in the background
+        self.prefetcher.start(self.model.get_game_level())
         # Register as as subscriber to the Event Manager
         self.eventManager = eventManager
         self.eventManager.register_listener(self)
@@ -48,8 +84,20 @@ class GameView():
                         self.levelRunning = True
                         self.gameOver = False
                         self.firstRun = 0
-                        # Set the current view to the current level's view
-                        self.view = PrimaryView.PrimaryView(self.model, self.eventManager)
+                        # Set the current view to the current level's view,
+                        # using the level's platform if already prepared
+                        levelPlatform = self.prefetcher.collect(level)
+                        self.view = PrimaryView.PrimaryView(self.model, 
+                                                            self.eventManager,
+                                                            levelPlatform,
+                                                            self.dirtyRendering,
+                                                            self.drawing,
+                                                            self.display)
+                        self.prefetcher.store(level, self.view.levelPlatform)
+                        # Save the hashes of any images loaded for the level
+                        DiskCache.diskCache.flush()
+                        if self.startupTimer:
+                            self.startupTimer.mark('First level build')
                         # Private method to generate the whole level inside a
                         # running loop to allow frames to repeat
                         self._create_current_level_loop()
@@ -67,39 +115,87 @@ class GameView():
             self.levelComplete == False):
                 self.levelComplete = True
                 self.eventManager.event_clear(event)
+                # Start preparing the next level while the end screen shows
+                self.prefetcher.start(self.model.get_game_level() + 1)
 
     def _create_current_level_loop(self):
         """Generate a running loop for the current level.
         This allows the level to continuously iterate through recalculated 
-        frames until the level is finished or a game over event is fired."""
+        frames until the level is finished or a game over event is fired.
+        The level is simulated in fixed steps, decoupled from drawing. The 
+        time since the last frame is added to the lag, and as many steps run
+        as fit in it, so a slow machine runs several steps for each frame 
+        drawn rather than slowing the game down. Each frame is then drawn 
+        between the last two steps, by the fraction of a step left over."""
+        # Run a single step for the first frame
+        lag = self.timestep
+        resync = False
         while self.levelRunning and self.systemRunning:
-            # Listen for the termination event to break the while loop
-            self._listen_for_level_kill_event()
-            showEndScreen = False
-            # If levelRunning is false, the game has just finished, so display 
-            # the end screen at the beginning of the next loop
-            if self.levelRunning ==False:
-                # Game has just finished
-                showEndScreen = True
-            self.clock.tick(150)
+            elapsed = self.clock.tick(self.renderRate) / 1000.0
+            # After showing one of the level's screens, which may have 
+            # waited, start running from a single step again
+            if resync:
+                lag = self.timestep
+                resync = False
+            else:
+                lag += elapsed
             # Check to see if the user has pressed the escape key to close 
             # the game
             self._top_level_event_handling()
-            # Access the  current controller values for this frame and ensure
-            # they are passed to the Event Manager
-            self.controller.get_game_event_values()
-            self.controller.show_actions()
-            # Get the return value from the level running loop and assign it
-            # to the firstRun property to be checked for actions later on
-            self.firstRun = self.view.activate_running_loop(self.firstRun, showEndScreen)
-            # Flip the display and show everything to the user
-            pygame.display.flip()
-            # If the firstRun variable is negative, the gameOver event has 
-            # fired within the level and therefore we should set the gameOver
-            # and levelRunning properties accordingly
-            if self.firstRun<0:
-                self.gameOver = True
-                self.levelRunning = False
+            steps = 0
+            while lag >= self.timestep and self.levelRunning and self.systemRunning:
+                lag -= self.timestep
+                steps += 1
+                self._run_simulation_step()
+                if not self.view.running:
+                    resync = True
+                    break
+                if steps == MAX_STEPS_PER_FRAME:
+                    # Too far behind to catch up, so drop the rest of the lag
+                    lag %= self.timestep
+                    break
+            # Draw the running level between the last two steps
+            if self.drawing and self.view.running:
+                self.view.draw_frame(lag / self.timestep)
+            # Present the display and show everything to the user
+            if self.presenting:
+                self.view.present()
+            # Report the startup time, once the first frame has been shown
+            if self.startupTimer:
+                self.startupTimer.mark('First frame')
+                print(self.startupTimer.get_report())
+                self.startupTimer = None
+            # Look for connected joysticks once the first frame has been 
+            # shown, so the search doesn't hold up the game starting. This is
+            # done on the main thread, as SDL's joystick subsystem must be 
+            # used from the thread which handles its events.
+            if not self.controller.joysticksSearched:
+                self.controller.find_joysticks()
+
+    def _run_simulation_step(self):
+        """Private method. Runs one fixed step of the level's simulation, 
+        passing the controller's values for the step to the level."""
+        # Listen for the termination event to end the level loop
+        self._listen_for_level_kill_event()
+        showEndScreen = False
+        # If levelRunning is false, the game has just finished, so display 
+        # the end screen in this step
+        if self.levelRunning ==False:
+            # Game has just finished
+            showEndScreen = True
+        # Access the  current controller values for this step and ensure
+        # they are passed to the Event Manager
+        self.controller.get_game_event_values()
+        self.controller.show_actions()
+        # Get the return value from the level running loop and assign it
+        # to the firstRun property to be checked for actions later on
+        self.firstRun = self.view.activate_running_loop(self.firstRun, showEndScreen)
+        # If the firstRun variable is negative, the gameOver event has 
+        # fired within the level and therefore we should set the gameOver
+        # and levelRunning properties accordingly
+        if self.firstRun<0:
+            self.gameOver = True
+            self.levelRunning = False
 
     def _listen_for_level_kill_event(self):
         """Listens for kill events. Changes the object instance property 
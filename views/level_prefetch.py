@@ -0,0 +1,119 @@
+import threading
+import pygame
+from models import level_source as LevelSource
+from views import platforms_view as Platform
+from views import frame_cache as FrameCache
+
+class LevelPrefetcher():
+    """Prepares a level on a worker thread while the player is looking at
+    an end screen, so that building the next level's view is near instant.
+    The level's model data is copied on the main thread, and the worker 
+    reads the level file, finds every sprite position in the platform and
+    decodes the level's full screen images, without touching the game 
+    model. Only the steps
+    that must run on the main thread, such as converting the images to the
+    display format, are left for when the prepared level is collected.
+    Prepared platforms are kept, so restarting a level reuses them too."""
+
+    def __init__(self, model, size):
+        """Bind the model to the instance and initialise the stores for the
+        worker threads and prepared platforms. Levels are prepared for a 
+        screen of the given size."""
+        self.model = model
+        self.size = size
+        # Dictionary of level numbers to worker threads
+        self.workers = {}
+        # Dictionary of level numbers to prepared platform designs
+        self.platforms = {}
+        # Dictionary of level numbers to lists of (image url, alpha) pairs
+        # to convert
+        self.imageUrls = {}
+
+    def start(self, levelNumber):
+        """Starts preparing the given level in the background, unless it is
+        already prepared or being prepared, or there is no such level."""
+        if (levelNumber not in self.model.levels or
+            levelNumber in self.workers or levelNumber in self.platforms):
+            return
+        worker = threading.Thread(target=self._prepare, 
+                                  args=(levelNumber, 
+                                        LevelSnapshot(self.model, levelNumber),
+                                        self.size))
+        worker.daemon = True
+        self.workers[levelNumber] = worker
+        worker.start()
+
+    def collect(self, levelNumber):
+        """Returns the prepared platform design for the given level, waiting
+        for the worker to finish if it is still running, and converts the
+        level's decoded images to the display format. Returns None if the
+        level hasn't been prepared."""
+        worker = self.workers.pop(levelNumber, None)
+        if worker:
+            worker.join()
+        # Final main thread step, convert and scale the decoded images
+        screen = pygame.display.get_surface()
+        for imageUrl, alpha in self.imageUrls.pop(levelNumber, []):
+            if screen:
+                FrameCache.frameCache.get_image(imageUrl, self.size, alpha)
+        return self.platforms.get(levelNumber)
+
+    def store(self, levelNumber, platform):
+        """Keeps a platform design built on the main thread, so that it can
+        be reused if the level is restarted."""
+        self.platforms[levelNumber] = platform
+
+    def _prepare(self, levelNumber, snapshot, size):
+        """Private method. Runs on the worker thread. Only uses the given 
+        snapshot of the level's model data, so the model used by the running
+        level is left untouched."""
+        try:
+            platform = Platform.PlatformDesign(snapshot, size)
+            platform.preload()
+            imageUrls = snapshot.imageUrls
+            for imageUrl, alpha in imageUrls:
+                FrameCache.frameCache.decode_image(imageUrl, size, alpha)
+            self.imageUrls[levelNumber] = imageUrls
+            self.platforms[levelNumber] = platform
+        except Exception:
+            # If anything goes wrong the level will simply be built on the
+            # main thread as normal
+            pass
+
+class LevelSnapshot():
+    """The parts of the game model needed to prepare a single level, copied
+    on the main thread so that the worker never shares the model's mutable
+    state. Provides the methods of the model used by the platform design.
+    The level's source is built from its level file on first use, on the
+    worker thread."""
+
+    def __init__(self, model, levelNumber):
+        """Copy the level's file url, the character representations and the
+        urls of the level's full screen images from the model, without 
+        changing the model's current level."""
+        levelIndex = levelNumber - 1
+        self.levelUrl = model.levelFiles[levelIndex]
+        self.characterReps = dict(model.characterReps)
+        self.levelPlatform = None
+        # List of (image url, alpha) pairs to decode. Every background layer
+        # but the base layer has alpha.
+        currentLevel = model.currentGameLevel
+        try:
+            model.currentGameLevel = levelIndex
+            self.imageUrls = [(imageUrl, i > 0) for i, (imageUrl, speed) in
+                              enumerate(model.get_level_background_layers())]
+            self.imageUrls += [(model.get_level_start_image(), False),
+                               (model.get_level_end_image(), False)]
+        finally:
+            model.currentGameLevel = currentLevel
+
+    def get_level_platform(self):
+        """Returns the level's source, indexing the level file on the first
+        request only."""
+        if self.levelPlatform is None:
+            self.levelPlatform = LevelSource.LevelSource(self.levelUrl)
+        return self.levelPlatform
+
+    def get_char_representations(self, char):
+        """Returns the specified character's internal representation."""
+        return self.characterReps[char]
@@ -4,6 +4,13 @@ from views import sprite_groups_view as SpriteGroups
 from views import platforms_view as Platform
 from views import background_view as Background
 from views import score_view as ScoreManager
+from views import frame_cache as FrameCache
+from views import text_view as TextView
+from views import world_stream as WorldStream
+from views import camera as Camera
+from views import tile_layer as TileLayer
+from views import dirty_rects as DirtyRects
+from views import display as Display
 from time import time as timer
 
 class PrimaryView():
@@ -12,11 +19,18 @@ class PrimaryView():
     responsible for generating all sub-views within the level, including the 
     primary character, platform objects, background objects and enemy sprites."""
 
-    def __init__(self, model, eventManager):
+    def __init__(self, model, eventManager, levelPlatform=None, 
+                 dirtyRendering=False, drawing=True, display=None):
         """Initialise the outer level view. Assigns the model
         instance to the view and defines and initialises the basic properties 
         of the outer view. Additionally spawns all the necessary sub-views for 
-        the character, platform and enemy sprites."""
+        the character, platform and enemy sprites. A platform design already
+        prepared for the level can be passed in to save generating it 
+        again. With dirty rendering only the parts of the window which 
+        changed are redrawn and presented each frame. If drawing is False 
+        the level is updated every frame without ever being drawn, e.g. when
+        running headless. The level is drawn on the given display, which 
+        lasts between levels; if no display is given a new one is opened."""
         # Bind the Event Manager to the instance and register as a subscriber        
         self.eventManager = eventManager
         self.eventManager.register_listener(self)
@@ -26,22 +40,24 @@ class PrimaryView():
         self.gameOver = False
         # Get the current level background image from the game model
         self.background = model.get_level_background_image()
-        # Set screen size and display resolution
-        # The below three lines can be commented/ uncommented to set the game
-        # to full screen or window mode, depending on preference. In the future 
-        # this could be attached to a controller event, to give the user the 
-        # choice potentially
-        self.size = (1366, 768)
-        self.screen = pygame.display.set_mode(self.size)
-        # self.screen = pygame.display.set_mode(self.size, pygame.FULLSCREEN)
+        # Draw on the display's surface, at the display's internal resolution
+        if display is None:
+            display = Display.Display()
+        self.display = display
+        self.size = display.size
+        self.screen = display.surface
 
+        self.drawing = drawing
         # Currently starting so not paused 
         self.pause = False
         self.pauseTime = 0
         self.noStart = True
         # Get the platform layout by passing the model to the platformDesign
-        # class and generating the necessary platform positions
-        self.levelPlatform = Platform.PlatformDesign(model)
+        # class and generating the necessary platform positions, unless it 
+        # has already been prepared
+        if levelPlatform is None:
+            levelPlatform = Platform.PlatformDesign(model, self.size)
+        self.levelPlatform = levelPlatform
         # Initialise the Score Manager for this level and pass in the screen,
         # model and Event Manager
         self.scoreManager = ScoreManager.ScoreManager(self.screen, 
@@ -54,10 +70,33 @@ class PrimaryView():
         self.background = Background.BackgroundImage(self.size,
                                                      self.screen,
                                                      self.background,
-                                                     self.eventManager)
+                                                     self.eventManager,
+                                                     model.get_level_background_layers())
+        # Dirty rendering tracks the areas of the window which change each 
+        # frame. The background doesn't drift while the level is still, as 
+        # that would change the whole window every other frame.
+        self.dirtyRects = None
+        if dirtyRendering:
+            self.dirtyRects = DirtyRects.DirtyRectTracker(self.size)
+            self.background.driftSpeed = 0
+        # The list of rects of the window to present for the current frame, 
+        # or None to present the whole window
+        self.updateRects = None
+        # Whether the last update ran the level, rather than showing one of 
+        # the level's screens, and whether the background or camera moved 
+        # since the level was last drawn
+        self.running = False
+        self.backgroundMoved = False
+        self.lastCameraX = None
         # Create a default list of high scores to beat. These will hopefully 
         # be overridden later by reading the high scores file.
         self.highScores = [0,0,0]
+        # Store of HUD text drawn by this view, keyed by font, font size and
+        # position, so each is only composed again when its text changes
+        self.hudTexts = {}
+        # The camera onto the level's world. The level's sprites are 
+        # positioned in world coordinates and scrolling only moves the camera
+        self.camera = Camera.Camera()
         # Generate a list of all characters and their positions. This list 
         # can consist of initialised sprite objects directly, or generator 
         # expressions of initialised sprite objects (useful for spawning 
@@ -66,33 +105,22 @@ class PrimaryView():
             # Add the main character
             Sprites.Markio(self.screen,
                            self.eventManager,
-                           [self.levelPlatform.get_level_block_positions(), self.levelPlatform.get_level_invis_positions()])
+                           [self.levelPlatform.get_level_block_positions(), self.levelPlatform.get_level_invis_positions()],
+                           self.camera)
             # Add the Cloud sprite to the game
             ,Sprites.Cloud(self.screen, self.eventManager)
             # Add 4 Dragonfly sprites to the game
             # Use a generator expression to produce desired number in group
             ,(Sprites.Dragonfly(self.screen, self.eventManager)
                 for i in range(4))
-            # Add the platform Blocks to the game
-            ,(Sprites.Block(self.screen, i, self.eventManager)
-                for i in self.levelPlatform.get_level_block_positions())
-            # Add the enemy Mice sprites to the game
-            ,(Sprites.Mouse(self.screen, i, self.eventManager)
-                for i in self.levelPlatform.get_level_mouse_positions())
-            # Add the enemy Worm sprites to the game
-            ,(Sprites.Worm(self.screen, i, self.eventManager)
-                for i in self.levelPlatform.get_level_worm_positions())
-            # Add the gold coins to be collected to the game
-            ,(Sprites.Coin(self.screen, i, self.eventManager)
-                for i in self.levelPlatform.get_level_coin_positions())
-            # Add the invisble block sprites to the game, these can be used
-            # to build platforms in the game, which are not visible to the 
-            # user e.g. the floor for instance
-            ,(Sprites.InvisibleBlock(self.screen, i, self.eventManager) 
-                for i in self.levelPlatform.get_level_invis_positions())
-            # Add the Castle sprite, (level end) to the game
-            ,(Sprites.Castle(self.screen, i, levelEndPoint, self.eventManager) 
-                for i in self.levelPlatform.get_level_castle_positions())
+            # The level's platform objects and enemies are added to their 
+            # groups by the world streamer as they come near the screen
+            ,[]
+            ,[]
+            ,[]
+            ,[]
+            ,[]
+            ,[]
         ]# End of list of Characters array
         # Additionally provide the names for each of the charactors lsited 
         # above and a list of whether or not they should be destroyed on 
@@ -115,12 +143,66 @@ class PrimaryView():
                                    True, 
                                    False, 
                                    False]
+        # Finally provide whether each of the characters is positioned in the
+        # level's world, rather than on the screen
+        self.inWorld = [False,
+                        False,
+                        False,
+                        True,
+                        True,
+                        True,
+                        True,
+                        True,
+                        True]
+        # Provide a factory and the positions for each type of sprite 
+        # streamed in from the level. The positions are split into column 
+        # chunks and a chunk's sprites are only created when it is near the 
+        # screen, so long levels cost no more per frame than short ones.
+        spawners = {
+            # Add the platform Blocks to the game
+            'block' : (lambda i: Sprites.Block(self.screen, i, self.eventManager),
+                       self.levelPlatform.get_level_block_positions())
+            # Add the enemy Mice sprites to the game
+            ,'mouse' : (lambda i: Sprites.Mouse(self.screen, i, self.eventManager),
+                        self.levelPlatform.get_level_mouse_positions())
+            # Add the enemy Worm sprites to the game
+            ,'worm' : (lambda i: Sprites.Worm(self.screen, i, self.eventManager),
+                       self.levelPlatform.get_level_worm_positions())
+            # Add the gold coins to be collected to the game
+            ,'coin' : (lambda i: Sprites.Coin(self.screen, i, self.eventManager),
+                       self.levelPlatform.get_level_coin_positions())
+            # Add the invisble block sprites to the game, these can be used
+            # to build platforms in the game, which are not visible to the 
+            # user e.g. the floor for instance
+            ,'invis' : (lambda i: Sprites.InvisibleBlock(self.screen, i, 
+                                                         self.eventManager),
+                        self.levelPlatform.get_level_invis_positions())
+            # Add the Castle sprite, (level end) to the game
+            ,'castle' : (lambda i: Sprites.Castle(self.screen, i, levelEndPoint,
+                                                  self.eventManager),
+                         self.levelPlatform.get_level_castle_positions())
+        }
+        self.worldStreamer = WorldStream.WorldStreamer(self.camera, self.size[0],
+                                                       spawners)
+        # The blocks, invisible blocks and coins never move or animate, so 
+        # they are pre-rendered on to tile layers which are drawn in a few 
+        # large blits. Their sprites are still streamed in for collisions. 
+        # The coins have a layer of their own, drawn in their place above 
+        # the mice and worms, so the drawing order is kept.
+        self.tileLayers = [TileLayer.TileLayer(self.camera, 
+                                               dict((name, spawners[name]) 
+                                                    for name in names))
+                           for names in (('block', 'invis'), ('coin',))]
         # Initialise all the characters and assign them to their new groups
         self.players = SpriteGroups.GenerateGroups(self.screen,
                                                    self.listOfCharactors,
                                                    self.listOfCharactorNames,
                                                    self.destroyOnCollision,
-                                                   self.eventManager)
+                                                   self.eventManager,
+                                                   self.worldStreamer,
+                                                   self.camera,
+                                                   self.inWorld,
+                                                   self.tileLayers)
 
     def activate_running_loop(self, firstRun, showEndScreen):
         """Activates the loop in which the level will refresh. This 
@@ -129,7 +211,10 @@ class PrimaryView():
         given interval otherwise. The method returns the counter variable at 
         the end of each iteration, to state where it is within the loop. A 
         negative value indicates the game is over and to restart the whole 
-        level."""
+        level. While the level is running this only updates it, the level 
+        is then drawn by draw_frame."""
+        self.updateRects = None
+        self.running = False
         # If this is one of the first two loops in the current level show the
         # start screen for a specified period of time
         if firstRun < 2:
@@ -159,16 +244,43 @@ class PrimaryView():
                 pygame.time.delay(1000)
             elif self.gameOver == False:
                 # Update the background position
-                self.background.reposition_background()
-                self.scoreManager.update_score()
+                self.background.update()
+                if self.background.get_dirty_rect() is not None:
+                    self.backgroundMoved = True
+                self.scoreManager.update_score(draw=False)
                 # Add/ remove players to/ from the screen and update their actions
-                self.players.update_all_player_groups()
+                self.players.update_all_player_groups(draw=False)
+                self.running = True
             else:
                 self.game_over()
                 # Return negative to indicate level should be restarted
                 return -1
         return firstRun
 
+    def draw_frame(self, alpha=1.0):
+        """Draws the running level, with the sprites and camera the given 
+        fraction of the way from their positions before the last update to
+        their current positions. With dirty rendering only the parts of the
+        window which changed are drawn."""
+        self.updateRects = None
+        if not self.drawing:
+            return
+        self.players.interpolate(alpha)
+        if self.dirtyRects:
+            self._draw_dirty_frame()
+        else:
+            self.background.draw(self.screen)
+            self.scoreManager.draw(self.screen)
+            self.players.draw_all_player_groups(self.screen)
+        self.backgroundMoved = False
+        self.lastCameraX = self.camera.renderX
+
+    def present(self):
+        """Shows the frame drawn by the running loop in the game window, 
+        updating only its changed parts if the frame was drawn by dirty
+        rendering."""
+        self.display.present(self.updateRects)
+
     def game_over(self):
         """Performs 'Game Over' functions, primarily displaying the 
         'Game Over' image on the game window screen."""
@@ -206,20 +318,27 @@ class PrimaryView():
     def _display_game_image(self, imUrl):
         """Displays an image from a given image url and blits
         it to the game screen. Resizes the image to fill the screen 
-        and attaches it directly to the game window."""
-        # Load image, convert, transform and blit
-        img = pygame.image.load(imUrl)
-        img = img.convert()
-        img = pygame.transform.scale(img, self.size)
+        and attaches it directly to the game window. The resized image is
+        taken from the frame cache, so it is only decoded and scaled once."""
+        if not self.drawing:
+            return
+        img = FrameCache.frameCache.get_image(imUrl, self.size)
         self.screen.blit(img,(0,0))
+        # The level has been drawn over, so must be redrawn in full
+        if self.dirtyRects:
+            self.dirtyRects.invalidate()
 
     def _display_game_text(self, text, font, fontSize, position):
         """Displays a given string in a given font at a given 
         position and blits it on to the game screen. Automatically 
         sets colour."""
-        font = pygame.font.Font(font, fontSize)
-        txt = font.render(text,True,(0,0,0))
-        self.screen.blit(txt, position)
+        if not self.drawing:
+            return
+        key = (font, fontSize, position)
+        if key not in self.hudTexts:
+            self.hudTexts[key] = TextView.HudText(font, fontSize, (0,0,0),
+                                                  position)
+        self.hudTexts[key].draw(self.screen, text)
 
     def _show_start_screen(self):
         """Shows the current level's Splash screen image and 
@@ -280,3 +399,34 @@ class PrimaryView():
                                     './assets/fonts/font_1.ttf',
                                     20,
                                     (20,20))
+
+    def _draw_dirty_frame(self):
+        """Private method. Draws the level with dirty rendering. The 
+        background, HUD and sprites are only redrawn in the areas of the 
+        window which changed since the last frame, which are then the only
+        areas presented. The whole level is redrawn if the background moved
+        or too much of the window changed."""
+        # Collect the areas changed by the HUD text and collected tiles
+        changedRects = self.scoreManager.pop_dirty_rects()
+        for tileLayer in self.tileLayers:
+            changedRects += [rect.move(-self.camera.renderX, 0) for rect in 
+                             tileLayer.pop_erased_rects()]
+        # The whole level moves on the screen if the camera or background 
+        # moved
+        moved = (self.camera.renderX != self.lastCameraX or 
+                 self.backgroundMoved)
+        rects = self.dirtyRects.track(self.players.get_drawn_sprites(),
+                                      changedRects, moved)
+        if rects is None:
+            self.background.draw(self.screen)
+            self.scoreManager.draw(self.screen)
+            self.players.draw_all_player_groups(self.screen)
+        else:
+            # Redraw each changed area, clipped so nothing else is touched
+            for rect in rects:
+                self.screen.set_clip(rect)
+                self.background.restore(self.screen, rect)
+                self.scoreManager.draw(self.screen)
+                self.players.draw_all_player_groups(self.screen, rect)
+            self.screen.set_clip(None)
+        self.updateRects = rects
@@ -1,5 +1,7 @@
 import pygame
 from easypg.sprites import Sprite
+from models import level_source as LevelSource
+from views import display as Display
 
 class PlatformDesign():
     """Build the level's platform as specified by the details
@@ -7,13 +9,18 @@ class PlatformDesign():
     individual sprites passed and assigning specific position based on the 
     data return by the model for the current level."""
 
-    def __init__(self, model):
+    def __init__(self, model, screenSize=Display.WINDOW_SIZE):
         """Gets corresponding values for each sprite from the model. 
-        Additionally initialises the class properties."""
+        Additionally initialises the class properties. The level's rows are
+        fitted to the height of the given screen size."""
         # Add the model to the object
         self.model = model
+        self.screenSize = screenSize
         # Get the level platform design from the model for the current level
         self.levelPlatform = model.get_level_platform()
+        if not isinstance(self.levelPlatform, LevelSource.LevelSource):
+            # A plain list of row strings
+            self.levelPlatform = LevelSource.LevelSource.from_rows(self.levelPlatform)
         # Get each character's corresponding value
         self.block = self.model.get_char_representations("block")
         self.worm = self.model.get_char_representations("worm")
@@ -27,6 +34,13 @@ class PlatformDesign():
         self.endPoint = None
         self.widthScaleFactor = 1
         self.heightScaleFactor =1
+        # The compiled level. The grid holds one byte per tile (the upper 
+        # case character code, or zero for an empty tile) in rows of 
+        # abstractLevelMaxWidth tiles. The positions dictionary holds the 
+        # list of positions for each type of sprite. Both are built by a 
+        # single pass over the level the first time they are needed.
+        self.grid = None
+        self.positions = {}
 
     def get_level_block_positions(self):
         """Returns positions of block sprites."""
@@ -52,22 +66,38 @@ class PlatformDesign():
         """Return positions of mouse sprites."""
         return self._get_level_sprite_positions(self.mouse)
 
+    def preload(self):
+        """Compiles the level ahead of time, so later requests for sprite 
+        positions return straight away. This is used to prepare a level in 
+        the background."""
+        self._compile_level()
+
     def get_level_end_point(self):
         """Returns the end point of the level i.e. the point at 
         which the player has finished the level and won."""
         if self.endPoint == None:
-            self._get_level_sprite_positions(self.block)
+            self._compile_level()
             self.endPoint = self.abstractLevelMaxWidth*32
-            return self.endPoint
-        else:
-            return self.endPoint
+        return self.endPoint
+
+    def get_tile(self, column, row):
+        """Returns the character at the given column and row of the 
+        compiled level, or a space if the tile is empty or outside the
+        level."""
+        self._compile_level()
+        if (0 <= column < self.abstractLevelMaxWidth and 
+            0 <= row < self.abstractLevelMaxHeight):
+            code = self.grid[row*self.abstractLevelMaxWidth + column]
+            if code:
+                return chr(code)
+        return ' '
 
     def _get_max_abstract_size(self):
         """Get the maximum level platform width and height 
         at any point from the data supplied by the model. Note these are 
         relative units and do not yet correspond to pixel value positions."""
-        self.abstractLevelMaxHeight = len(self.levelPlatform)
-        self.abstractLevelMaxWidth = max((len(line) for line in self.levelPlatform))
+        self.abstractLevelMaxHeight = self.levelPlatform.height
+        self.abstractLevelMaxWidth = self.levelPlatform.width
 
     def _get_scale_factors(self):
         """Get the scale factors for calculating the pixel 
@@ -77,29 +107,50 @@ class PlatformDesign():
         self._get_max_abstract_size()
         # This is the screen height minus the block
         # width minus the ground height
-        max_height = 768 -32 +10 
+        max_height = self.screenSize[1] -32 +10 
         self.widthScaleFactor = 32
         self.heightScaleFactor = max_height/ self.abstractLevelMaxHeight
 
+    def _compile_level(self):
+        """Compiles the level platform into the tile grid and the lists of
+        positions for every type of sprite. The level is streamed from its
+        source a chunk of columns at a time, so the level's rows are never 
+        all held in memory as strings. Does nothing if the level has already
+        been compiled."""
+        if self.grid is not None:
+            return
+        self._get_scale_factors()
+        width = self.abstractLevelMaxWidth
+        height = self.abstractLevelMaxHeight
+        grid = bytearray(width * height)
+        elements = (self.block, self.worm, self.coin, self.invisBlock,
+                    self.castle, self.mouse)
+        # Positions are gathered per row, so that they are listed in the 
+        # same row by row order as reading the whole level at once
+        rowPositions = dict((element, [[] for i in range(height)]) 
+                            for element in elements)
+        for chunkStart, rows in self.levelPlatform.iter_chunks():
+            for yPosition, row in enumerate(rows):
+                rowStart = yPosition * width
+                for xPosition, col in enumerate(row.upper(), chunkStart):
+                    if col == ' ':
+                        continue
+                    grid[rowStart + xPosition] = ord(col) & 0xff
+                    if col in rowPositions:
+                        # create the element on the game where necessary
+                        rowPositions[col][yPosition].append(
+                            (xPosition*self.widthScaleFactor, 
+                             yPosition*self.heightScaleFactor))
+        self.positions = dict((element, [position for row in rows 
+                                         for position in row]) 
+                              for element, rows in rowPositions.items())
+        self.grid = grid
+
     def _get_level_sprite_positions(self, element):
         """Returns the position of every instance of a 
         given sprite in the current level according to the game model. A 
         sprite value can be passed in to check for its corresponding list 
-        of positions. Returns a list of 2 pair tuples."""
-        level = self.levelPlatform
-
-        self._get_scale_factors()
-        self.elements = []
-        xPosition = -1
-        yPosition = -1
-        for row in level:
-            yPosition += 1
-            xPosition = -1
-            for col in row:
-                xPosition += 1
-                if col.upper() == element:
-                    # create the element on the game where necessary
-                    position = (xPosition*self.widthScaleFactor, yPosition*self.heightScaleFactor)
-                    self.elements.append(position)
-        return self.elements
-                    
\ No newline at end of file
+        of positions. Returns a list of 2 pair tuples. The list is shared by
+        every caller and must not be modified."""
+        self._compile_level()
+        return self.positions.get(element, [])
@@ -1,6 +1,7 @@
 # Import all the relevant libraries
 import pygame
 from time import time as timer
+from views import text_view as TextView
 
 class ScoreManager():
     """Manages the score tally for the character at each level. Allows updating 
@@ -22,6 +23,13 @@ class ScoreManager():
         # Record the start time
         self.startTime = timer()
         self.time = 5
+        # HUD text for the score and time. Each piece of text is only 
+        # rendered again when its value changes
+        self.scoreText = TextView.HudText('./assets/fonts/font_1.ttf', 40,
+                                          (233,58,33), 
+                                          (screen.get_width() - 366, 30))
+        self.timeText = TextView.HudText('./assets/fonts/font_1.ttf', 40,
+                                         (233,58,33), (50, 30))
 
     def notify_event(self, event):
         """Check if the event matches the Level End event and if so check if 
@@ -30,28 +38,31 @@ class ScoreManager():
             self.startTime = (pygame.time.get_ticks()/1000)
             self._register_final_score()
 
-    def update_score(self):
+    def update_score(self, draw=True):
         """Update the score displayed. Does not update the value of the store, 
         but simply gets the value and blits it to the screen. This method only 
-        updates every 19 frames, to help maintain performance."""
+        updates every 19 frames, to help maintain performance. If draw is 
+        False the text is brought up to date without being drawn, so that it
+        can be drawn later by dirty rectangle rendering."""
         if self.updateCounter % 19 == 0:
             self.score = self.eventManager.get_rapid_counter_value("CHARACTER_COLLIDE_COIN")
-        self._print_score()
-        self._print_time()
+        self.scoreText.set_text('Score: ' +str(self.score))
+        self._calculate_remaining_time()
+        self.timeText.set_text('Time: ' +str(self.time))
+        if draw:
+            self.draw(self.screen)
         self.updateCounter += 1
 
-    def _print_score(self):
-        """Generates the score and blits to screen."""
-        font = pygame.font.Font('./assets/fonts/font_1.ttf', 40)
-        txt = font.render('Score: ' +str(self.score),True,(233,58,33))
-        self.screen.blit(txt, (1000, 30))
+    def draw(self, screen):
+        """Blits the current score and time to the screen."""
+        self.scoreText.blit(screen)
+        self.timeText.blit(screen)
 
-    def _print_time(self):
-        """Generates the time and blits to screen."""
-        self._calculate_remaining_time()
-        font = pygame.font.Font('./assets/fonts/font_1.ttf', 40)
-        txt = font.render('Time: ' +str(self.time),True,(233,58,33))
-        self.screen.blit(txt, (50, 30))
+    def pop_dirty_rects(self):
+        """Returns the list of areas of the screen changed by the score and
+        time text since this was last called."""
+        return [rect for rect in (self.scoreText.pop_dirty_rect(),
+                                  self.timeText.pop_dirty_rect()) if rect]
 
     def _calculate_remaining_time(self):
         """Calculates time left to complete current level."""
@@ -0,0 +1,68 @@
+import pygame
+
+class SoundBank():
+    """A process-wide bank of sound effects. Every effect is decoded once when
+    the bank is loaded and the resulting Sound objects are reused for every
+    play. A fixed set of mixer channels is reserved for the effects and the
+    number of simultaneous voices per effect is capped, so playing an effect
+    in the game loop never allocates or blocks. If there is no audio device
+    the bank acts as a silent sink and playing an effect does nothing."""
+
+    def __init__(self, reservedChannels=4, maxVoices=2):
+        """Set the number of mixer channels to reserve and the maximum number
+        of voices for a single effect. Nothing is loaded until the load
+        method is called."""
+        self.reservedChannels = reservedChannels
+        self.maxVoices = maxVoices
+        # Dictionary of effect names to Sound objects
+        self.sounds = {}
+        self.channels = []
+        self.enabled = False
+
+    def load(self, effects):
+        """Decodes each effect in the given dictionary of effect names to
+        file urls and reserves the mixer channels. The mixer must already 
+        have been initialised, so that this can be called from a background
+        thread. If it hasn't been, or there's no sound card, the bank is 
+        left disabled and the game carries on silently."""
+        try:
+            if not pygame.mixer.get_init():
+                self.enabled = False
+                return
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(),
+                                              self.reservedChannels))
+            pygame.mixer.set_reserved(self.reservedChannels)
+            self.channels = [pygame.mixer.Channel(i)
+                             for i in range(self.reservedChannels)]
+        except Exception:
+            self.enabled = False
+            return
+        # Load each effect, skipping any that can't be decoded
+        for name, url in effects.items():
+            try:
+                self.sounds[name] = pygame.mixer.Sound(url)
+            except Exception:
+                pass
+        self.enabled = True
+
+    def play(self, name):
+        """Plays the named effect on a free reserved channel. The effect is
+        dropped if the bank is disabled, the effect is unknown, the effect
+        is already playing on the maximum number of voices or every reserved
+        channel is busy."""
+        if not self.enabled or name not in self.sounds:
+            return
+        sound = self.sounds[name]
+        voices = 0
+        freeChannel = None
+        for channel in self.channels:
+            if channel.get_busy():
+                if channel.get_sound() is sound:
+                    voices += 1
+            elif freeChannel is None:
+                freeChannel = channel
+        if freeChannel is not None and voices < self.maxVoices:
+            freeChannel.play(sound)
+
+# The single sound bank shared by the whole game
+soundBank = SoundBank()
@@ -0,0 +1,111 @@
+import math
+
+# Width and height in pixels of each cell of the grid
+CELL_SIZE = 64
+
+class SpatialGrid():
+    """A uniform grid over the level's world, holding the positions of the
+    level's static geometry e.g. the blocks. Each position is kept in the
+    cell it falls in, so finding the positions within a rect only looks at
+    the few cells the rect overlaps, however large the level is. Positions
+    are in world coordinates, so scrolling the level never changes the
+    grid."""
+
+    def __init__(self, points=(), cellSize=CELL_SIZE):
+        """Set the size of the cells and add any points given."""
+        self.cellSize = cellSize
+        # Dictionary of (column, row) cell keys to lists of points
+        self.cells = {}
+        for point in points:
+            self.add(point)
+
+    def add(self, point):
+        """Adds an (x, y) point to the grid."""
+        key = (math.floor(point[0] / self.cellSize),
+               math.floor(point[1] / self.cellSize))
+        self.cells.setdefault(key, []).append(point)
+
+    def query(self, rect):
+        """Returns a list of the points in the cells overlapping the rect.
+        The rect is grown by a pixel either way, so points which round on
+        to its edges are included."""
+        size = self.cellSize
+        points = []
+        for column in range((rect.left - 1) // size, rect.right // size + 1):
+            for row in range((rect.top - 1) // size, rect.bottom // size + 1):
+                cell = self.cells.get((column, row))
+                if cell:
+                    points.extend(cell)
+        return points
+
+    def collide_rect(self, rect):
+        """Returns True if any point in the grid lies within the rect."""
+        for point in self.query(rect):
+            if rect.collidepoint(point):
+                return True
+        return False
+
+    def __len__(self):
+        """Returns the number of points in the grid."""
+        return sum(len(cell) for cell in self.cells.values())
+
+class SpriteGrid():
+    """A uniform grid of sprites which never move while in the grid e.g. the
+    level's blocks and coins. Each sprite is kept in every cell its bounds
+    overlap, so the sprites near a rect are found by looking at the few
+    cells the rect overlaps, rather than at every sprite."""
+
+    def __init__(self, cellSize=CELL_SIZE):
+        """Set the size of the cells."""
+        self.cellSize = cellSize
+        # Dictionary of (column, row) cell keys to lists of sprites
+        self.cells = {}
+        # Dictionary of sprites to their bounds when they were added
+        self.bounds = {}
+
+    def add(self, sprite):
+        """Adds a sprite to the grid, at its current position."""
+        if sprite in self.bounds:
+            return
+        bounds = get_bounds(sprite)
+        self.bounds[sprite] = bounds
+        for key in self._get_keys(bounds):
+            self.cells.setdefault(key, []).append(sprite)
+
+    def remove(self, sprite):
+        """Removes a sprite from the grid, if it is in it."""
+        bounds = self.bounds.pop(sprite, None)
+        if bounds is None:
+            return
+        for key in self._get_keys(bounds):
+            cell = self.cells[key]
+            cell.remove(sprite)
+            if not cell:
+                del self.cells[key]
+
+    def query(self, rect):
+        """Returns a list of the sprites whose bounds overlap the rect."""
+        found = []
+        for key in self._get_keys(rect):
+            for sprite in self.cells.get(key, ()):
+                if sprite not in found and rect.colliderect(self.bounds[sprite]):
+                    found.append(sprite)
+        return found
+
+    def _get_keys(self, rect):
+        """Private method. Returns a list of the keys of the cells which the
+        rect overlaps."""
+        size = self.cellSize
+        return [(column, row)
+                for column in range(rect.left // size, 
+                                    (rect.right - 1) // size + 1)
+                for row in range(rect.top // size, 
+                                 (rect.bottom - 1) // size + 1)]
+
+def get_bounds(sprite):
+    """Returns the rect covering both a sprite's rect and its mask, or image
+    if it has no mask, placed at the rect's top left corner. This is the
+    area in which the sprite can collide."""
+    mask = getattr(sprite, 'mask', None)
+    size = mask.get_size() if mask is not None else sprite.image.get_size()
+    return sprite.rect.union(sprite.rect.topleft, size)
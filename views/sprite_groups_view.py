@@ -1,16 +1,28 @@
 import pygame
+from views import camera as Camera
+from views import spatial_grid as SpatialGrid
 
 class GenerateGroups():
     """Generates sprite groups for individual sprites. Contains methods to 
     update all sprites in all groups and to check for collision detection with 
     the primary character (the first sprite supplied)."""
 
-    def __init__(self, screen, listOfCharactors, listOfCharactorNames, destroyOnCollision, eventManager):
+    def __init__(self, screen, listOfCharactors, listOfCharactorNames, destroyOnCollision, eventManager, worldStreamer=None, camera=None, inWorld=None, tileLayers=None):
         """Bind to the Event Manager and register as a 
-        subscriber. Additionally create a sprite image mask, using pygame for 
-        the main character, to provide additional collision accuracy and cache 
-        this mask, to prevent calling this method too often (because the method 
-        is expensive)."""
+        subscriber. Sprites provide the collision mask of their current 
+        frame, cached when the frame was loaded, to provide additional 
+        collision accuracy without building masks while checking for 
+        collisions (because building a mask is expensive). If a world 
+        streamer is given, it adds the level's sprites to their groups as
+        they come near the screen. The groups flagged in the inWorld list
+        hold sprites positioned in world coordinates, which are drawn 
+        relative to the camera. Every group culls the sprites away from the
+        screen before drawing. The groups
+        whose sprites are pre-rendered in one of the tile layers, if any are
+        given, are only used for collisions; each tile layer is drawn in 
+        the place of the first of its groups. The tiles never move, so their
+        groups keep their sprites in a spatial grid, used to find the tiles 
+        near the player."""
         self.eventManager = eventManager
         self.eventManager.register_listener(self)
         self.event = None
@@ -19,39 +31,119 @@ class GenerateGroups():
         self.listOfCharactorNames = listOfCharactorNames
         self.listOfCharactors = listOfCharactors
         self.destroyOnCollision = destroyOnCollision
-        # Create the sprite mask for the player character
-        self.listOfCharactors[0].mask = pygame.mask.from_surface(self.listOfCharactors[0].image)
+        self.camera = camera if camera else Camera.Camera()
+        self.inWorld = inWorld if inWorld else [False] * len(listOfCharactors)
+        self.tileLayers = tileLayers if tileLayers else []
+        # Create the sprite mask for the player character, if it doesn't 
+        # already have one
+        if getattr(self.listOfCharactors[0], 'mask', None) is None:
+            self.listOfCharactors[0].mask = pygame.mask.from_surface(self.listOfCharactors[0].image)
+        # A stand in for the player character in world coordinates, used to
+        # check for collisions with the sprites positioned in the world
+        self.playerInWorld = pygame.sprite.Sprite()
         groupNumber = 0
         # Create each type of sprite
         for charactorData in listOfCharactors:
-            self.groupList.append(pygame.sprite.Group(charactorData))
+            if self.inWorld[groupNumber]:
+                self.groupList.append(Camera.CameraGroup(self.camera, 
+                                                         charactorData,
+                                                         static=self._is_tile_group(groupNumber)))
+            else:
+                self.groupList.append(Camera.CullingGroup(charactorData))
             groupNumber += 1
+        self.worldStreamer = worldStreamer
+        if self.worldStreamer:
+            self.worldStreamer.bind_groups(dict(zip(self.listOfCharactorNames,
+                                                    self.groupList)))
 
-    def update_all_player_groups(self):
+    def update_all_player_groups(self, draw=True):
         """Updates all sprites in all groups; posts the latest events
-        to each sprite if appropriate and draws the sprites to the screen."""
+        to each sprite if appropriate and draws the sprites to the screen. If
+        draw is False the sprites are only updated, so that they can be 
+        drawn later by dirty rectangle rendering."""
         # Clear the event property
         self.event = None
+        # Keep the sprites' positions before this step, to draw between them
+        for groupNumber, group in enumerate(self.groupList):
+            if not self._is_tile_group(groupNumber):
+                group.store_positions()
         # Check for any new sprite collisions
         self._check_player_collide()
+        scrolled = False
+        layersDrawn = []
         # For each sprite group, update appropriately
-        for group in self.groupList:
-            if self.groupList.index(group) == self.listOfCharactorNames.index('block'):
-                group.update(self.event)
-            elif self.groupList.index(group) == self.listOfCharactorNames.index('worm'):
-                group.update(self.event)
-            elif self.groupList.index(group) == self.listOfCharactorNames.index('invis'):
-                group.update(self.event)
-            elif self.groupList.index(group) == self.listOfCharactorNames.index('coin'):
-                group.update(self.event)
-            elif self.groupList.index(group) == self.listOfCharactorNames.index('castle'):
-                group.update(self.event)
-            elif self.groupList.index(group) == self.listOfCharactorNames.index('mouse'):
-                group.update(self.event)
+        for groupNumber, group in enumerate(self.groupList):
+            if self.inWorld[groupNumber]:
+                # Once the player has moved, move the camera if the level is
+                # scrolling. This is the only work needed to scroll the level.
+                if not scrolled:
+                    if self.camera.scroll(self.event):
+                        self.eventManager.event_clear(self.event)
+                    scrolled = True
+                # Static tiles don't need updating and are all drawn at once
+                # by their tile layer, in the place of its first tile group
+                tileLayer = self._get_tile_layer(groupNumber)
+                if tileLayer:
+                    if draw and tileLayer not in layersDrawn:
+                        tileLayer.draw(self.screen)
+                        layersDrawn.append(tileLayer)
+                    continue
+                group.update(self.camera)
             else:
                 group.update()
             # Draw each group on the game window
-            group.draw(self.screen)
+            if draw:
+                group.draw(self.screen)
+        # Stream the level's sprites in and out as the camera moves
+        if self.worldStreamer:
+            self.worldStreamer.update()
+
+    def draw_all_player_groups(self, surface, area=None):
+        """Draws all the groups on to the surface in order, with each tile 
+        layer in the place of its tile groups. If an area of the screen is
+        given, only the sprites overlapping it are drawn."""
+        layersDrawn = []
+        for groupNumber, group in enumerate(self.groupList):
+            tileLayer = self._get_tile_layer(groupNumber)
+            if tileLayer:
+                if tileLayer not in layersDrawn:
+                    tileLayer.draw(surface)
+                    layersDrawn.append(tileLayer)
+            elif area is None:
+                group.draw(surface)
+            else:
+                for sprite, rect in self._get_group_drawn_sprites(groupNumber):
+                    if area.colliderect(rect):
+                        surface.blit(sprite.image, rect)
+
+    def interpolate(self, alpha):
+        """Draws the sprites and the camera the given fraction of the way 
+        from their positions before the last step to their current 
+        positions, until the next step."""
+        self.camera.interpolate(alpha)
+        for group in self.groupList:
+            group.alpha = alpha
+
+    def get_drawn_sprites(self):
+        """Generates (sprite, screen rect) pairs for every sprite drawn by 
+        the groups, apart from the tiles drawn by the tile layers. The rect 
+        is the area of the screen covered by the sprite's image."""
+        for groupNumber in range(len(self.groupList)):
+            if not self._is_tile_group(groupNumber):
+                for spriteRect in self._get_group_drawn_sprites(groupNumber):
+                    yield spriteRect
+
+    def get_draw_counts(self):
+        """Returns the number of sprites drawn and the number culled in the
+        last frame, as a (drawn, culled) pair. The tiles drawn by the tile 
+        layers aren't included."""
+        drawn = 0
+        culled = 0
+        for groupNumber, group in enumerate(self.groupList):
+            if not self._is_tile_group(groupNumber):
+                drawn += group.drawnCount
+                culled += group.culledCount
+        return drawn, culled
 
     def notify_event(self, event):
         """Attaches current event to object instance 'event' property."""
@@ -61,21 +153,53 @@ class GenerateGroups():
         """Check if any sprites in any groups are colliding with the player 
         sprite. If so checks to see if the sprites should be removed from their 
         corresponding group and does so if required, then emits event specifying 
-        collision type."""
+        collision type. Only the sprites near the player, whose bounds 
+        overlap the player's, are tested against the player's mask."""
         i = 1 
+        player = self.listOfCharactors[0]
+        # Move the stand in for the player to the player's world position
+        self.playerInWorld.rect = self.camera.to_world(player.rect)
+        self.playerInWorld.mask = player.mask
+        screenBounds = SpatialGrid.get_bounds(player)
+        worldBounds = self.camera.to_world(screenBounds)
         # For each group check for collisions
         for group in self.groupList[1:]:
-            if self.destroyOnCollision[i]:
-                collide = pygame.sprite.spritecollide(self.listOfCharactors[0], 
-                                                      group,
-                                                      True,
-                                                      pygame.sprite.collide_mask)
+            if self.inWorld[i]:
+                collider = self.playerInWorld
+                nearby = group.get_nearby_sprites(worldBounds)
             else:
-                collide = pygame.sprite.spritecollide(self.listOfCharactors[0],
-                                                      group,
-                                                      False,
-                                                      pygame.sprite.collide_mask)
+                collider = player
+                nearby = group.get_nearby_sprites(screenBounds)
+            collide = [sprite for sprite in nearby 
+                       if pygame.sprite.collide_mask(collider, sprite)]
+            if self.destroyOnCollision[i]:
+                for sprite in collide:
+                    sprite.kill()
             if collide:
+                # Erase any collected tiles from the tile layer
+                if self.destroyOnCollision[i] and self._is_tile_group(i):
+                    for sprite in collide:
+                        self._get_tile_layer(i).erase(self.listOfCharactorNames[i],
+                                                      sprite)
                 collision = ["CHARACTER_COLLIDE_" + self.listOfCharactorNames[i].upper()]
                 self.eventManager.post(collision)
-            i +=1
\ No newline at end of file
+            i +=1
+
+    def _is_tile_group(self, groupNumber):
+        """Private method. Returns True if the sprites of the given group are
+        pre-rendered in a tile layer."""
+        return self._get_tile_layer(groupNumber) is not None
+
+    def _get_tile_layer(self, groupNumber):
+        """Private method. Returns the tile layer the sprites of the given 
+        group are pre-rendered in, or None if they aren't in one."""
+        for tileLayer in self.tileLayers:
+            if self.listOfCharactorNames[groupNumber] in tileLayer.names:
+                return tileLayer
+        return None
+
+    def _get_group_drawn_sprites(self, groupNumber):
+        """Private method. Returns a list of (sprite, screen rect) pairs for
+        the sprites of the given group near the screen, translated from the
+        world to the screen if need be."""
+        return self.groupList[groupNumber].get_visible_sprites(self.screen.get_rect())
@@ -1,20 +1,60 @@
 import pygame
 from easypg.sprites import Sprite
 from random import randint
-
-class Markio(Sprite):
+from views import frame_cache as FrameCache
+from views import sound_view as SoundBank
+from views import spatial_grid as SpatialGrid
+
+class CachedSprite(Sprite):
+    """An easypg sprite whose image store is taken from the process-wide 
+    frame cache rather than decoded from disk for every instance. Sprites 
+    built from the same asset directory, alpha flag and size share a single 
+    image store, so the store must be treated as read-only. Frames are 
+    decoded the first time their state and direction are used, apart from 
+    any given in the preload hint list. The sprite's collision mask is the
+    cached mask of its current frame, and changes along with its image."""
+
+    def __init__(self, screen, assetUrl, size=None, preload=None, **kwargs):
+        """Record the target frame size and preload hints and execute the 
+        parent class initialisation method, which will request the frames 
+        via the overridden directory loader."""
+        # The image store is replaced by the cached store when loaded
+        self.images = {}
+        self.frameSize = size
+        self.framePreload = preload
+        super().__init__(screen, assetUrl, **kwargs)
+        self.mask = FrameCache.frameCache.get_mask(self.image)
+
+    def _load_from_dir(self, path):
+        """Private method. Overrides the easypg loader to fetch the shared
+        image store from the frame cache."""
+        self.images = FrameCache.frameCache.get_images(path, self.alpha,
+                                                       self.frameSize,
+                                                       self.framePreload)
+
+    def animate(self):
+        """Animates the sprite by changing its image at regular intervals,
+        switching to the collision mask of the new image."""
+        super().animate()
+        self.mask = FrameCache.frameCache.get_mask(self.image)
+
+class Markio(CachedSprite):
     """Represents the Markio character. This is the primary game character -
     allows for manipulating position, applying gravity, changing
     sprite sequence, jumping, dying and checking interaction with other sprites."""
 
-    def __init__(self, screen, eventManager, levelBlocks):
+    def __init__(self, screen, eventManager, levelBlocks, camera=None):
         """Bind the screen, Event Manager and level block positions to the 
         instance and add a dictionary to enumerate character actions to class 
-        methods."""
-        # Image store for the sprite graphics
-        self.images = {}
-        # Activate the super class initialisation method
-        super().__init__(screen, './assets/images/dinosaur', state = 'run', direction='e')
+        methods. The character is positioned on the screen, while the block
+        positions are in world coordinates, so the camera is used to find 
+        the character's position in the world."""
+        # Activate the super class initialisation method. Only the run and 
+        # roar sequences are used, so only those are loaded up front
+        super().__init__(screen, './assets/images/dinosaur', 
+                         preload = [('run', 'e'), ('run', 'w'), 
+                                    ('roar', 'e'), ('roar', 'w')],
+                         state = 'run', direction='e')
         # Bind the Event Manager to this class and subscribe as a listener
         self.eventManager = eventManager
         self.eventManager.register_listener(self)
@@ -22,9 +62,11 @@ class Markio(Sprite):
         self.inComingNotification = []
         # Bind the screen to this class
         self.screen = screen
-        # Add the level brick positions to a single list which is accessible 
-        # throughout this class
-        self.levelBlocks = levelBlocks[0] + levelBlocks[1]
+        # Add the level brick positions to a single spatial grid which is 
+        # accessible throughout this class. The positions are in world 
+        # coordinates and never change as the level scrolls.
+        self.levelBlocks = SpatialGrid.SpatialGrid(levelBlocks[0] + levelBlocks[1])
+        self.camera = camera
         # Map character actions between controller events from event manager
         # to their corresponding class methods
         self.actions = {
@@ -78,11 +120,12 @@ class Markio(Sprite):
     def new_collision(self):
         """Detects if the sprite will collide with any of the level 
         bricks during its next movement. Uses characters internal representation 
-        of block positions to calculate if there will be a collision. """
-        for blockTuple in self.levelBlocks:
-            if self.rect.collidepoint(blockTuple):
-                return True
-        return False
+        of block positions to calculate if there will be a collision. Only 
+        the blocks in the cells of the grid around the character are 
+        checked."""
+        # Move the character's rect into the world, where the blocks are
+        worldRect = self.camera.to_world(self.rect) if self.camera else self.rect
+        return self.levelBlocks.collide_rect(worldRect)
 
     def _get_char_bottom_position(self):
         """Gets the character's bottom position"""
@@ -156,13 +199,9 @@ class Markio(Sprite):
         # Check that we aren't already jumping and if so, put us into 
         # vertical motion true
         if self.currentlyJumping == False:
-            # Try to load and play the specific sound file for the jump effect. 
-            # If it doesn't load ignore it and carry on anyway.
-            try:
-                sound = pygame.mixer.Sound('./assets/audio/jump.wav')
-                sound.play()
-            except Exception:
-                pass
+            # Play the jump effect from the sound bank. If there's no sound
+            # available this does nothing and we carry on anyway.
+            SoundBank.soundBank.play('jump')
             # Set the currentlyJumping property to true, assign a positive 
             # velocity and change the character sequence
             self.currentlyJumping = True
@@ -206,7 +245,6 @@ class Markio(Sprite):
             # If we are heading in the left direction
             if self.vx < 0 and False:
                 self.eventManager.post(["CHARACTER_AT_LEFT"])
-                self._blocks_update_left()
                 self.eventManager.event_clear(self.inComingNotification)
                 self.vx = 0
         # If we're as far as we can go to the right of the screen
@@ -214,11 +252,10 @@ class Markio(Sprite):
             # If we are heading in the right direction
             if self.vx > 0:
                 self.vx = 0
-                # If we aren't at the end of the level
+                # If we aren't at the end of the level, scroll the level. The
+                # camera is moved when the level's sprites are updated.
                 if not self.atEnd:
                     self.eventManager.post(["CHARACTER_AT_RIGHT"])
-                # Update the internal representation of the level block positions
-                self._blocks_update_right()
                 # Clear the current event from the Event Management
                 self.eventManager.event_clear(self.inComingNotification)
                 self.vx =0
@@ -233,32 +270,6 @@ class Markio(Sprite):
             if self.vy < 0:
                 self.vy = 0
 
-    def _blocks_update_general(self, nudge):
-        """Private method to move the characters representation of the block 
-        positions by the appropriate amount, to reflect their new positions 
-        within the game."""
-        # Empty list for the new brick positions
-        newLevelBlocks = []
-        # For each block, nudge it by the specified amount in the correct 
-        # direction, finally replace the current positions with the new 
-        # updated positions
-        for block in self.levelBlocks:
-            newBlock = (block[0]+nudge, block[1])
-            newLevelBlocks.append(newBlock)
-        self.levelBlocks = newLevelBlocks
-
-    def _blocks_update_left(self):
-        """Private method to move the characters representation of the 
-        block positions to the left. Uses internal methods to reposition 
-        representation."""
-        self._blocks_update_general(10)
- 
-    def _blocks_update_right(self):
-        """Private method to move the characters representation of the 
-        block positions to the right. Uses internal methods to reposition 
-        representation."""
-        self._blocks_update_general(-10)
-
     def _set_char_sequence(self, state, direction):
         """Private method to set the image sequence for the character. 
         Sets the sequence to the requested state and direction."""
@@ -291,29 +302,42 @@ class Markio(Sprite):
         return trueEventCount
 # End of Markio class
 
-class PlatfromObject(Sprite):
+class PlatfromObject(pygame.sprite.Sprite):
     """This class acts as a general class to create objects for the platform.
     Methods for positioning the object and for passing events to and from the
-    object are provided by this class."""
+    object are provided by this class. Platform objects are static, so every
+    instance of the same asset and size shares a single pre-scaled surface 
+    and holds only a reference to it and its own rect. The shared surfaces
+    are kept by the frame cache, so they are let go when their assets are
+    evicted. The rect is in world coordinates, so it doesn't move when the 
+    level scrolls."""
 
     def __init__(self, screen, position, eventManager, assetUrl, size, state, direction):
         """Initialise the class variables and execute the parent class 
         initialisation method. Bind the Event Manager to the object and 
-        set the initial image sequence."""
-        # A dictionary to act as an image store for the sprite
-        self.images = {}
+        set the shared image."""
         # Initialise the parent class
-        super().__init__(screen, assetUrl, alpha = True, state = state, 
-                         direction = direction, position = position)
+        super().__init__()
+        self.screen = screen
+        self.state = state
+        self.direction = direction
 
-        # Bind the Event Manager to this instance and subscribe to new posts
+        # Bind the Event Manager to this instance. Platform objects receive
+        # their events through update, so they don't subscribe to new posts
         self.eventManager = eventManager
-        self.eventManager.register_listener(self)
 
-        # Initialise the image sequence
-        self.image = self.images['-']['-'][0]
-        self.image = pygame.transform.scale(self.image, size)
-        self.images['-']['-'][0] = self.image
+        # Use the shared pre-scaled image. The rect takes the footprint of 
+        # the unscaled source frame, centred on the requested position
+        self.image, footprint = FrameCache.frameCache.get_shared_frame(
+            assetUrl, size, state, direction)
+        self.mask = FrameCache.frameCache.get_mask(self.image)
+        self.rect = pygame.Rect((0, 0), footprint)
+        self.rect.center = position
+
+    def reposition(self, position):
+        """Centres the object on a new position, so that a removed object 
+        can be reused for another position in the level."""
+        self.rect.center = position
 
     def notify_event(self, event):
         """Method required by all classes registered as a subscriber to the 
@@ -321,26 +345,23 @@ class PlatfromObject(Sprite):
         subsequent classes."""
         pass
 
-    def update(self, event):
-        """Method to update the sprite. Invokes internal move, animate and 
+    def update(self, camera):
+        """Method to update the sprite. Invokes internal move and 
         check_bounds methods."""
-        # If we're moving right move the position of the sprite object back
-        # by the corresponding amount
-        if event == ["CHARACTER_AT_RIGHT"]:
-            self.rect.centerx -= 10
-            # Clear the Event Manager of the current event
-            self.eventManager.event_clear(event)
-        # If we're moving left move the position of the sprite object back 
-        # by the corresponding amount
-        if event == ["CHARACTER_AT_LEFT"]:
-            self.rect.centerx += 10
-            # Clear the Event Manager of the current event
-            self.eventManager.event_clear(event)
         # Update the position
-        self.animate()
         self.move()
         self.check_bounds()
 
+    def move(self):
+        """Moves the object. Platform objects are static, so this is a stub
+        method which can be overridden by subsequent classes."""
+        pass
+
+    def check_bounds(self):
+        """Checks the object is within bounds. This is a stub method which
+        can be overridden by subsequent classes."""
+        pass
+
 class Block(PlatfromObject):
     """Class to generate a single Block object for the game platform at a 
     specific given position."""
@@ -371,23 +392,16 @@ class Castle(PlatfromObject):
         super().__init__(screen, position, eventManager, 
                         './assets/images/castle', (354,592), '-', '-')
 
-    def update(self, event):
-        """Method to update the sprite. Invokes internal move, animate and 
-        check_bounds methods."""
-        # If we're moving right move the position of the sprite object back
-        # by the corresponding amount
-        if event == ["CHARACTER_AT_RIGHT"]:
-            self.rect.centerx -= 10
-            self.eventManager.event_clear(event)
-            if self.rect.centerx <= 1250:
-                self.eventManager.post(["CHARACTER_AT_END"])
-        # If we're moving left move the position of the sprite object back
-        # by the corresponding amount
-        if event == ["CHARACTER_AT_LEFT"]:
-            self.rect.centerx += 10
-            self.eventManager.event_clear(event)
+    def update(self, camera):
+        """Method to update the sprite. Invokes internal move method and 
+        signals the end of the level once the castle has scrolled far enough
+        on to the screen."""
+        # If we've just scrolled right, check the castle's position on the 
+        # screen
+        if (camera.step > 0 and 
+            self.rect.centerx - camera.x <= self.screen.get_width() - 116):
+            self.eventManager.post(["CHARACTER_AT_END"])
         # Update the sprite position
-        self.animate()
         self.move()
 
 class Coin(PlatfromObject):
@@ -400,20 +414,22 @@ class Coin(PlatfromObject):
         super().__init__(screen, position, eventManager, 
                         './assets/images/coin', (32,32), '-', '-')
 
-class EnemySprite(Sprite):
+class EnemySprite(CachedSprite):
     """This class acts as a general class to create enemy sprite objects. 
     Methods for positioning the object and for passing events to and from 
-    the object are provided by this class."""
+    the object are provided by this class. Enemies which walk the level are
+    positioned in world coordinates."""
 
     def __init__(self, screen, position, eventManager,assetUrl, state, direction):
         """Initialise the class variables and execute the parent class 
         initialisation method. Bind the Event Manager to the object and 
         set the initial image sequence."""
-        # Create a store for the images for the sprite sequence
-        self.images = {}
-        # Execute the parent class initialisation method
-        super().__init__(screen, assetUrl, alpha = False, state = state, 
-                         direction = direction, position = position)
+        # Execute the parent class initialisation method. Enemies only ever
+        # face east or west, so only those sequences are loaded up front
+        super().__init__(screen, assetUrl, alpha = False, 
+                         preload = [(state, 'e'), (state, 'w')], 
+                         state = state, direction = direction, 
+                         position = position)
         # Get the game window screen size
         self.screenSize = screen.get_size()
         # Bind the Event Manager to this object and register as a 
@@ -433,28 +449,14 @@ class EnemySprite(Sprite):
         repositions sprite appropriately."""
         self.rect.centerx += self.vx
 
-    def update(self, event):
+    def update(self, camera):
         """Method to update the sprite. Invokes internal move, animate 
-        and check_bounds methods. Also updates position of enemy sprites 
-        to reflect the new position of the character i.e. to make them 
-        move backwards as the character moves forwards to create the 
-        illusion of the character travelling forward through the world."""
-        # If we're currently at the right of the game window, move the enemy
-        # sprites backwards
-        if event == ["CHARACTER_AT_RIGHT"]:
-            self.rect.centerx -= 10
-            # Remove the event for the Event Manager now it is finished with
-            self.eventManager.event_clear(event)
-        # If we're currently at the left of the window, move the enemy
-        # sprites forwards
-        if event == ["CHARACTER_AT_LEFT"]:
-            self.rect.centerx += 10
-            # Remove the event for the Event Manager now it is finished with
-            self.eventManager.event_clear(event)
+        and check_bounds methods. The camera gives the part of the world 
+        currently on the screen."""
         # Update the sprite details
         self.animate()
         self.move()
-        self.check_bounds()
+        self.check_bounds(camera)
 
     def _set_char_sequence(self, state, direction):
         """Private method to set the image sequence for the character. 
@@ -498,7 +500,7 @@ class Mouse(EnemySprite):
         # Limit the distance the mouse can travel in either direction to +- 20px
         self.allowableTravel = 20
 
-    def check_bounds(self):
+    def check_bounds(self, camera):
         """Method to check that character is within the physical bounds of 
         their allowableTravel property. Maintains the character in the game 
         window and prevents movement outside the allowableTravel distance."""
@@ -513,7 +515,7 @@ class Mouse(EnemySprite):
             # Use internal method to change sprite direction in image sequence
             self._alter_state()
         # If we go off the screen, delete the sprite to reclaim the memory etc
-        if self.rect.left < 0:
+        if self.rect.left < camera.x:
             self.kill()
         
 class Worm(EnemySprite):
@@ -533,11 +535,11 @@ class Worm(EnemySprite):
         # Generate the random horizontal velocity
         self.vx = -0.06 * (randint(2,9))
 
-    def check_bounds(self):
+    def check_bounds(self, camera):
         """Method to check that character is within the physical bounds of the
         window. Maintains the character in the game window and kills the 
         character on movement outside."""
-        if self.rect.left < 0:
+        if self.rect.left < camera.x:
             self.kill()
 
 class Dragonfly(EnemySprite):
@@ -597,7 +599,7 @@ class Dragonfly(EnemySprite):
                 self.vy *= -1
 
 
-class Cloud(Sprite):
+class Cloud(CachedSprite):
     """Class to create a single cloud instance. This object produces a simple
     animated cloud graphic for the game, to add dynamically positioned clouds 
     which move over the background layer."""
@@ -606,17 +608,12 @@ class Cloud(Sprite):
         """Initialise the cloud instance and set the dictionary for the image
         store, bind the screen and Event Manager to the instance and
         initialise the vertical and horizontal velocities."""
-        # Create a dictionary for the image store for the image sequences
-        self.images = {}
         # Invoke the parent class initialisation method
-        super().__init__(screen, './assets/images/cloud', alpha = True)
+        super().__init__(screen, './assets/images/cloud', size = (300, 101),
+                         alpha = True)
         # Bind the Event Manager to the instance of the Cloud object
         self.eventManager = eventManager
         self.eventManager.register_listener(self)
-        # Set the initial image in the image sequence
-        self.image = self.images['-']['-'][0]
-        self.image = pygame.transform.scale(self.image, (300, 101))
-        self.images['-']['-'][0] = self.image
         # Get the size of the image and assign to the rect property
         self.rect = self.image.get_rect()
         # Bind the screen size to the Cloud instance for later use in 
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+import pygame
+
+# Most rendered strings kept by the text renderer. Strings such as the time
+# change every second, so only the most recently used are kept.
+MAX_RENDERED = 64
+
+class TextRenderer():
+    """A process-wide store of fonts and rendered strings. Fonts are opened
+    once per font file and size, and each string is rendered whole by the
+    font, keeping its kerning, once per font and colour. The most recently
+    used strings are kept, so text which repeats is never rendered again."""
+
+    def __init__(self, maxRendered=MAX_RENDERED):
+        """Initialise empty font and rendered string stores."""
+        # Dictionary of (fontUrl, fontSize) keys to Font objects
+        self.fonts = {}
+        # Ordered dictionary of (fontUrl, fontSize, colour, text) keys to
+        # rendered surfaces, least recently used first
+        self.rendered = OrderedDict()
+        self.maxRendered = maxRendered
+
+    def get_font(self, fontUrl, fontSize):
+        """Returns the Font object for the given font file and size, opening
+        the file on the first request only."""
+        key = (fontUrl, fontSize)
+        if key not in self.fonts:
+            self.fonts[key] = pygame.font.Font(fontUrl, fontSize)
+        return self.fonts[key]
+
+    def render(self, text, fontUrl, fontSize, colour):
+        """Returns a surface showing the given text, rendering it on the 
+        first request only. The returned surface is shared and must not be
+        modified by the caller."""
+        key = (fontUrl, fontSize, tuple(colour), text)
+        if key in self.rendered:
+            self.rendered.move_to_end(key)
+        else:
+            font = self.get_font(fontUrl, fontSize)
+            self.rendered[key] = font.render(text, True, colour)
+            if len(self.rendered) > self.maxRendered:
+                self.rendered.popitem(last=False)
+        return self.rendered[key]
+
+class HudText():
+    """A single piece of HUD text, such as the score or the remaining time,
+    drawn at a fixed position. The text surface is only rendered again when
+    the displayed string changes, and the area covered by the old and new
+    text is recorded for dirty rectangle rendering."""
+
+    def __init__(self, fontUrl, fontSize, colour, position):
+        """Bind the font details and position to the instance."""
+        self.fontUrl = fontUrl
+        self.fontSize = fontSize
+        self.colour = colour
+        self.position = position
+        self.text = None
+        self.image = None
+        # Area of the screen changed by the text since it was last asked for
+        self.dirtyRect = None
+
+    def draw(self, screen, text):
+        """Blits the given text to the screen, rendering a new surface only
+        if the text differs from that drawn last time."""
+        self.set_text(text)
+        self.blit(screen)
+
+    def set_text(self, text):
+        """Sets the text to display, rendering a new surface only if the 
+        text differs from the current text."""
+        if text != self.text:
+            oldRect = self.get_rect()
+            self.text = text
+            self.image = textRenderer.render(text, self.fontUrl,
+                                             self.fontSize, self.colour)
+            changed = self.get_rect()
+            for rect in (oldRect, self.dirtyRect):
+                if rect:
+                    changed = changed.union(rect)
+            self.dirtyRect = changed
+
+    def blit(self, screen):
+        """Blits the current text to the screen."""
+        if self.image:
+            screen.blit(self.image, self.position)
+
+    def get_rect(self):
+        """Returns the area of the screen covered by the current text, or 
+        None if there is no text yet."""
+        if self.image:
+            return self.image.get_rect(topleft=self.position)
+        return None
+
+    def pop_dirty_rect(self):
+        """Returns the area of the screen changed by the text since this was
+        last called, or None if it hasn't changed."""
+        dirtyRect = self.dirtyRect
+        self.dirtyRect = None
+        return dirtyRect
+
+# The single text renderer shared by the whole game
+textRenderer = TextRenderer()
@@ -0,0 +1,165 @@
+import json
+import math
+import os
+import pygame
+from easypg.sprites import Sprite
+from views import disk_cache as DiskCache
+
+# Suffix appended to a sprite directory's path to locate its atlas files
+ATLAS_SUFFIX = '.atlas'
+
+class AtlasBuilder():
+    """Offline tool to pack the loose animation frames of a sprite directory
+    into sheets, plus a compact JSON index of each frame's rect keyed by state
+    and direction. Frames are found using the easypg file naming convention
+    ([state]_[direction]_[num]). Each state is packed on to its own sheet, so
+    that a state can be loaded without decoding the frames of every other
+    state. The atlas for 'assets/images/worm' is written alongside the 
+    directory as 'worm.atlas.json' with sheets such as 'worm.atlas.creep.png'
+    (or 'worm.atlas.png' for frames without a state)."""
+
+    def __init__(self, maxSheetWidth=4096):
+        """Set the widest sheet the builder is allowed to produce."""
+        self.maxSheetWidth = maxSheetWidth
+
+    def build(self, assetUrl):
+        """Packs every frame in the given directory into an atlas and writes
+        the sheets and index to disk. Returns the path of the index, or None
+        if the directory holds no frames."""
+        frames = self._find_frames(assetUrl)
+        if not frames:
+            return None
+        atlasUrl = os.path.normpath(assetUrl) + ATLAS_SUFFIX
+        # Build the index of frame rects, each entry being the sheet number
+        # followed by the x, y, width and height of the frame on that sheet
+        index = {'sheets' : [], 'frames' : {}}
+        for state in sorted(set(key[0] for key in frames)):
+            stateFrames = dict((key, surface) for key, surface in frames.items()
+                               if key[0] == state)
+            sheetName = os.path.basename(atlasUrl)
+            if state != '-':
+                sheetName += '.' + state
+            sheetName += '.png'
+            sheet, rects = self._pack(stateFrames)
+            pygame.image.save(sheet, os.path.join(os.path.dirname(atlasUrl),
+                                                  sheetName))
+            sheetNumber = len(index['sheets'])
+            index['sheets'].append(sheetName)
+            for (_, direction, _), rect in zip(sorted(stateFrames), rects):
+                index['frames'].setdefault(state, {}).setdefault(direction, []).append(
+                    [sheetNumber, rect.x, rect.y, rect.w, rect.h])
+        with open(atlasUrl + '.json', 'w') as indexFile:
+            json.dump(index, indexFile, separators=(',', ':'))
+        return atlasUrl + '.json'
+
+    def build_all(self, rootUrl):
+        """Builds an atlas for every sprite directory found beneath the given
+        root directory. Returns a list of the indexes written."""
+        built = []
+        for path, dirs, files in os.walk(rootUrl):
+            dirs.sort()
+            indexUrl = self.build(path)
+            if indexUrl:
+                built.append(indexUrl)
+        return built
+
+    def _find_frames(self, assetUrl):
+        """Private method. Loads each frame in the directory, returning a
+        dictionary of (state, direction, num) keys to surfaces."""
+        frames = {}
+        for name in sorted(os.listdir(assetUrl)):
+            match = Sprite.image_regexp.match(name)
+            if match:
+                key = (match.group(1) or '-', match.group(2) or '-',
+                       match.group(3))
+                frames[key] = pygame.image.load(os.path.join(assetUrl, name))
+        return frames
+
+    def _pack(self, frames):
+        """Private method. Packs the frames into rows (shelves) on a single
+        sheet roughly square in shape. Returns the sheet and a list of frame
+        rects in the sorted order of the frame keys."""
+        surfaces = [frames[key] for key in sorted(frames)]
+        totalArea = sum(s.get_width() * s.get_height() for s in surfaces)
+        widest = max(s.get_width() for s in surfaces)
+        sheetWidth = min(max(widest, int(math.ceil(math.sqrt(totalArea)))),
+                         max(widest, self.maxSheetWidth))
+        # Place the tallest frames first so each shelf wastes little space
+        order = sorted(range(len(surfaces)),
+                       key=lambda i: -surfaces[i].get_height())
+        rects = [None] * len(surfaces)
+        x = y = shelfHeight = 0
+        for i in order:
+            w, h = surfaces[i].get_size()
+            if x + w > sheetWidth:
+                x = 0
+                y += shelfHeight
+                shelfHeight = 0
+            rects[i] = pygame.Rect(x, y, w, h)
+            x += w
+            shelfHeight = max(shelfHeight, h)
+        sheet = pygame.Surface((sheetWidth, y + shelfHeight), pygame.SRCALPHA)
+        sheet.fill((0, 0, 0, 0))
+        for surface, rect in zip(surfaces, rects):
+            sheet.blit(surface, rect)
+        return sheet, rects
+
+class TextureAtlas():
+    """Runtime loader for atlases written by the AtlasBuilder. The index and
+    each sheet are read with a single file open, and the frames are sliced 
+    from the sheets as subsurfaces. Sheets are only decoded when a frame on 
+    them is first requested."""
+
+    def __init__(self, assetUrl):
+        """Read the atlas index for the given sprite directory."""
+        self.atlasUrl = os.path.normpath(assetUrl) + ATLAS_SUFFIX
+        with open(self.atlasUrl + '.json', 'r') as indexFile:
+            self.index = json.load(indexFile)
+        # Dictionary of (sheet number, alpha) keys to decoded sheets
+        self.sheets = {}
+
+    @staticmethod
+    def exists(assetUrl):
+        """Returns True if an atlas has been built for the given sprite
+        directory."""
+        return os.path.isfile(os.path.normpath(assetUrl) + ATLAS_SUFFIX + '.json')
+
+    def get_frame_index(self):
+        """Returns a dictionary of each state held by the atlas against a list
+        of the directions available for that state."""
+        return dict((state, list(directions))
+                    for state, directions in self.index['frames'].items())
+
+    def load_frames(self, state, direction, alpha=False, size=None):
+        """Returns the animation sequence for the given state and direction 
+        as a list of surfaces. Non-alpha frames use the colour of their top 
+        left pixel as a colour key, as easypg does."""
+        return [self._slice_frame(self._get_sheet(rect[0], alpha), rect[1:],
+                                  alpha, size)
+                for rect in self.index['frames'][state][direction]]
+
+    def _get_sheet(self, sheetNumber, alpha):
+        """Private method. Returns the given sheet converted to the display 
+        format, loading it through the disk cache on first use."""
+        key = (sheetNumber, alpha)
+        if key not in self.sheets:
+            name = self.index['sheets'][sheetNumber]
+            self.sheets[key] = DiskCache.diskCache.load_image(
+                os.path.join(os.path.dirname(self.atlasUrl), name), alpha)
+        return self.sheets[key]
+
+    def _slice_frame(self, sheet, rect, alpha, size):
+        """Private method. Returns a single frame from the sheet, scaled to
+        the given size if required."""
+        image = sheet.subsurface(pygame.Rect(rect))
+        if not alpha:
+            image.set_colorkey(image.get_at((0, 0)))
+        if size:
+            image = pygame.transform.scale(image, size)
+        return image
+
+if __name__ == "__main__":
+    """Build step for the texture atlases. Run from the game's root directory
+    to pack every sprite directory beneath ./assets."""
+    for indexUrl in AtlasBuilder().build_all('./assets'):
+        print('Built ' + indexUrl)
@@ -0,0 +1,140 @@
+import pygame
+
+# Width in pixels of each pre-rendered chunk of the tile layer
+CHUNK_WIDTH = 512
+# Number of chunks either side of the screen which are kept once rendered
+KEEP_CHUNKS = 2
+
+class TileLayer():
+    """A pre-rendered layer holding the level's static tiles, such as blocks
+    and coins. The tiles are drawn once on to chunk surfaces spanning a
+    column of the world, and each frame only the chunks under the camera are
+    blitted, rather than every tile separately. Chunks are rendered the
+    first time they come on screen and let go once they are well off it, so
+    long levels don't hold every chunk at once. Tiles which are collected
+    are erased by rendering their chunks again without them.
+
+    The tiles' sprites are still used for collisions, but are neither drawn
+    nor updated."""
+
+    def __init__(self, camera, tiles, chunkWidth=CHUNK_WIDTH):
+        """Bind the camera and lay out the tiles. Tiles is a dictionary of
+        group names to (factory, positions) pairs, as used by the world
+        streamer. A single sprite is created from each factory to find the
+        tile's image and its position relative to the sprite's centre."""
+        self.camera = camera
+        self.chunkWidth = chunkWidth
+        self.names = set(tiles.keys())
+        # Dictionary of group names to (image, rect) pairs, where the rect is
+        # that of a sprite of the group centred on the origin
+        self.tileImages = {}
+        # Dictionary of chunk indexes to lists of (group name, position) of
+        # the tiles which may overlap the chunk. The lists are only turned
+        # into rects when the chunk is rendered.
+        self.chunkTiles = {}
+        top = None
+        bottom = None
+        for name, (factory, positions) in tiles.items():
+            sample = factory((0, 0))
+            image = sample.image
+            # Tiles which are completely transparent e.g. invisible blocks
+            # are left out of the layer
+            if not positions or not image.get_bounding_rect().width:
+                continue
+            self.tileImages[name] = (image, sample.rect)
+            # Each tile is listed against every chunk it might overlap, 
+            # allowing a pixel either side for the rounding of its position
+            left = sample.rect.left - 1
+            right = sample.rect.left + image.get_width() + 1
+            for position in positions:
+                x = int(position[0])
+                for chunkIndex in range((x + left) // chunkWidth,
+                                        (x + right) // chunkWidth + 1):
+                    self.chunkTiles.setdefault(chunkIndex, []).append((name, 
+                                                                       position))
+            # The highest and lowest tiles give the rows to render
+            rows = [self._get_tile_rect(name, position) for position in 
+                    (min(positions, key=lambda i: i[1]), 
+                     max(positions, key=lambda i: i[1]))]
+            top = rows[0].top if top is None else min(top, rows[0].top)
+            bottom = (rows[1].top + image.get_height() if bottom is None else
+                      max(bottom, rows[1].top + image.get_height()))
+        # Chunks only span the rows holding tiles
+        self.top = top or 0
+        self.height = (bottom - top) if top is not None else 0
+        # Dictionary of chunk indexes to rendered chunk surfaces
+        self.chunks = {}
+        # Set of keys of tiles which have been collected
+        self.removed = set()
+        # List of world rects of tiles erased since last asked for
+        self.erasedRects = []
+        self.visible = None
+
+    def draw(self, surface):
+        """Draws the part of the layer under the camera on to the surface,
+        rendering any chunks which haven't been rendered yet."""
+        if not self.height:
+            return
+        width = surface.get_width()
+        cameraX = self.camera.renderX
+        first = int(cameraX // self.chunkWidth)
+        last = int((cameraX + width - 1) // self.chunkWidth)
+        if (first, last) != self.visible:
+            self.visible = (first, last)
+            self._release_chunks(first, last)
+        for chunkIndex in range(first, last + 1):
+            if chunkIndex not in self.chunkTiles:
+                continue
+            if chunkIndex not in self.chunks:
+                self.chunks[chunkIndex] = self._render_chunk(chunkIndex)
+            surface.blit(self.chunks[chunkIndex],
+                         (chunkIndex * self.chunkWidth - cameraX, self.top))
+
+    def erase(self, name, sprite):
+        """Erases the tile of the given sprite from the layer e.g. when a
+        coin is collected."""
+        key = (name, tuple(sprite.rect))
+        if key in self.removed:
+            return
+        self.removed.add(key)
+        if name in self.tileImages:
+            self.erasedRects.append(pygame.Rect(sprite.rect.topleft,
+                self.tileImages[name][0].get_size()))
+        for chunkIndex in range(sprite.rect.left // self.chunkWidth - 1,
+                                sprite.rect.right // self.chunkWidth + 2):
+            if chunkIndex in self.chunks:
+                self.chunks[chunkIndex] = self._render_chunk(chunkIndex)
+
+    def pop_erased_rects(self):
+        """Returns the list of world rects of the tiles erased since this was
+        last called, for dirty rectangle rendering."""
+        erasedRects = self.erasedRects
+        self.erasedRects = []
+        return erasedRects
+
+    def _render_chunk(self, chunkIndex):
+        """Private method. Returns a surface with every remaining tile which
+        overlaps the chunk drawn on to it."""
+        chunk = pygame.Surface((self.chunkWidth, self.height), pygame.SRCALPHA)
+        left = chunkIndex * self.chunkWidth
+        for name, position in self.chunkTiles[chunkIndex]:
+            rect = self._get_tile_rect(name, position)
+            if (name, tuple(rect)) not in self.removed:
+                chunk.blit(self.tileImages[name][0], (rect.left - left,
+                                                      rect.top - self.top))
+        return chunk
+
+    def _get_tile_rect(self, name, position):
+        """Private method. Returns the rect of the sprite of the named group
+        at the given position. Its image is drawn at its top left corner."""
+        rect = self.tileImages[name][1].copy()
+        rect.center = position
+        return rect
+
+    def _release_chunks(self, first, last):
+        """Private method. Lets go of the rendered chunks which are well off
+        the screen."""
+        for chunkIndex in list(self.chunks.keys()):
+            if (chunkIndex < first - KEEP_CHUNKS or
+                chunkIndex > last + KEEP_CHUNKS):
+                del self.chunks[chunkIndex]
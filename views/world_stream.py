@@ -0,0 +1,113 @@
+# Width in pixels of each column chunk of the world
+CHUNK_WIDTH = 512
+# Distance in pixels beyond each side of the screen within which chunks are
+# kept loaded. This must be more than half the width of the widest sprite,
+# so sprites are always created before any part of them is on screen.
+STREAM_MARGIN = 512
+
+class WorldStreamer():
+    """Streams the sprites of a level in and out of their groups as the
+    camera scrolls through the world. The level is split into column chunks
+    and a chunk's sprites are only created when the chunk comes within a 
+    margin of the screen, then removed again when it has scrolled past, so 
+    the number of sprites updated and drawn each frame depends on what is 
+    near the screen rather than on the length of the level. Static platform objects are
+    recycled through a pool rather than created again. Sprites which have
+    been killed, such as collected coins, are never created again."""
+
+    def __init__(self, camera, screenWidth, spawners, chunkWidth=CHUNK_WIDTH,
+                 margin=STREAM_MARGIN):
+        """Split the spawn positions into chunks. Spawners is a dictionary of
+        group names to (factory, positions) pairs, where the factory creates
+        a sprite at a given world position and positions are the level
+        positions of every sprite in the group. Nothing is created until the
+        groups are bound."""
+        self.camera = camera
+        self.screenWidth = screenWidth
+        self.chunkWidth = chunkWidth
+        self.margin = margin
+        self.factories = {}
+        # Dictionary of chunk indexes to lists of (spawn key, position)
+        # pairs, where the spawn key is the group name and position index
+        self.chunks = {}
+        for name, (factory, positions) in spawners.items():
+            self.factories[name] = factory
+            for i, position in enumerate(positions):
+                chunkIndex = int(position[0] // chunkWidth)
+                self.chunks.setdefault(chunkIndex, []).append(((name, i),
+                                                               position))
+        self.groups = {}
+        # Dictionary of spawn keys to the sprites currently in their groups
+        self.live = {}
+        # Set of spawn keys of sprites which have been killed
+        self.consumed = set()
+        # Dictionary of group names to lists of recycled sprites
+        self.pools = {}
+        self.window = None
+
+    def bind_groups(self, groups):
+        """Binds the dictionary of group names to sprite groups which the
+        streamed sprites are added to, and streams in the sprites near the
+        starting screen."""
+        self.groups = groups
+        self._stream()
+
+    def update(self):
+        """Streams chunks in and out whenever the camera has moved far enough
+        to change the set of chunks near the screen."""
+        if self._get_window() != self.window:
+            self._stream()
+
+    def get_live_count(self):
+        """Returns the number of streamed sprites currently in their
+        groups."""
+        return len(self.live)
+
+    def _get_window(self):
+        """Private method. Returns the first and last indexes of the chunks
+        within the margin of the screen."""
+        return (int((self.camera.x - self.margin) // self.chunkWidth),
+                int((self.camera.x + self.screenWidth + self.margin) //
+                    self.chunkWidth))
+
+    def _stream(self):
+        """Private method. Removes the sprites which have left the window
+        and creates the sprites of the chunks which have entered it."""
+        self.window = self._get_window()
+        first, last = self.window
+        # World coordinates of the edges of the window's chunks
+        left = first * self.chunkWidth
+        right = (last + 1) * self.chunkWidth
+        for key, sprite in list(self.live.items()):
+            if not sprite.alive():
+                # Killed e.g. collected or walked off the screen
+                self.consumed.add(key)
+                del self.live[key]
+                self._recycle(key[0], sprite)
+            elif (sprite.rect.right < left or sprite.rect.left > right):
+                sprite.kill()
+                del self.live[key]
+                self._recycle(key[0], sprite)
+        for chunkIndex in range(first, last + 1):
+            for key, position in self.chunks.get(chunkIndex, ()):
+                if key in self.live or key in self.consumed:
+                    continue
+                sprite = self._spawn(key[0], position)
+                self.groups[key[0]].add(sprite)
+                self.live[key] = sprite
+
+    def _spawn(self, name, position):
+        """Private method. Returns a sprite for the named group at the given
+        world position, reusing a recycled sprite where there is one."""
+        pool = self.pools.get(name)
+        if pool:
+            sprite = pool.pop()
+            sprite.reposition(position)
+            return sprite
+        return self.factories[name](position)
+
+    def _recycle(self, name, sprite):
+        """Private method. Keeps a removed sprite for reuse, if it can be
+        repositioned i.e. it is a static platform object."""
+        if hasattr(sprite, 'reposition'):
+            self.pools.setdefault(name, []).append(sprite)